@@ -0,0 +1,52 @@
+import numpy as np
+from batch_ik import DEFAULT_MODEL
+
+# Forward kinematics: the inverse of batch_ik, step by step, for the same
+# leg model. A round trip fk(ik(target)) returns the target wherever the IK
+# is exact, so the difference measures IK error and hidden clamping.
+
+
+def core_to_leg_frame(core, model=DEFAULT_MODEL):
+    """
+    Inverse of batch_ik.solve_core: core angles (..., 3) in degrees to the
+    leg-frame point (u, y, w) they reach.
+    """
+    hip = np.radians(core[..., 0])
+    thigh = np.radians(90 - core[..., 1])
+    shin = np.radians(225 - core[..., 2])
+
+    # Knee triangle: hip-to-foot distance g in the leg plane and its angle
+    g = np.sqrt(np.maximum(model.link_squares - model.link_product * np.cos(shin), 0))
+    alpha = np.arcsin(np.clip(model.shin_length * np.sin(shin) / np.where(g > 0, g, 1), -1, 1))
+    d = g * np.cos(thigh - alpha)
+    y = -g * np.sin(thigh - alpha)
+
+    # Hip rotation: the foot sits on a circle of radius r around the hip axis
+    r = np.sqrt(d ** 2 + model.hip_offset ** 2)
+    beta = hip - np.arctan2(d, model.hip_offset)
+    x = r * np.sin(beta)
+    z = r * np.cos(beta)
+    return x - model.hip_x_shift, y, -z
+
+
+def batch_leg_fk(angles, masks=None, pitch=0, roll=0, pose=None):
+    """
+    Foot targets (..., 3) reached by (hip, thigh, shin) angles (..., 3) in degrees,
+    the inverse of batch_leg_ik for the same masks and pitch/roll (or pose).
+    """
+    if pose is None:
+        pose = DEFAULT_MODEL.pose(pitch, roll, masks)
+
+    # Undo right-leg mirroring and the pitch/roll compensation
+    core = np.array(angles, dtype=float)
+    right = np.broadcast_to(pose.side < 0, core.shape[:-1])
+    core[right] = 180 - core[right]
+    core[..., 0] -= pose.side * pose.roll
+    core[..., 1] -= pose.pitch
+
+    u, y, w = core_to_leg_frame(core, pose.model)
+    targets = np.empty(core.shape)
+    targets[..., 0] = -pose.side * u
+    targets[..., 1] = y
+    targets[..., 2] = w - pose.height_offsets
+    return targets
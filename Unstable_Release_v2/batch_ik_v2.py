@@ -0,0 +1,235 @@
+import math
+import numpy as np
+
+# Leg order used for every per-leg array (rows of targets and angles)
+LEG_IDS = ('FL', 'FR', 'BL', 'BR')
+JOINTS = ('hip', 'thigh', 'shin')
+
+# Body dimensions (cm)
+BODY_LENGTH = 29.5
+BODY_WIDTH = 8
+HIP_X_SHIFT = 6.25   # Hip offset adjustment applied before IK (see leg_ik)
+HIP_OFFSET = 6.2
+THIGH_LENGTH = 10.5
+SHIN_LENGTH = 13
+
+# Reachability margins (cm) for the safe solver
+MIN_FOOT_DEPTH = 1.0    # Foot at least this far below the hip axis (z > 0 in the core)
+MIN_LEG_SPAN = 0.1      # Knee-plane distance d kept away from 0 (atan(-y / d))
+REACH_TOLERANCE = 1e-9  # Points this close to a limit count as reachable
+
+
+def leg_masks(leg_ids=LEG_IDS):
+    """
+    Builds the per-leg sign masks used by batch_leg_ik.
+    Returns (side, end) arrays of shape (N,):
+      side: +1 for left legs, -1 for right legs (x mirror, roll sign, output mirror)
+      end:  +1 for front legs, -1 for back legs (pitch sign)
+    """
+    side = np.array([1.0 if "L" in leg_id.upper() else -1.0 for leg_id in leg_ids])
+    end = np.array([1.0 if leg_id.upper() in ['FL', 'FR'] else -1.0 for leg_id in leg_ids])
+    return side, end
+
+
+DEFAULT_MASKS = leg_masks()
+
+
+class RobotModel:
+    """
+    Link lengths and per-leg sign vectors, set up once and shared by every IK
+    backend. Scalar copies of the signs are kept for the per-leg solver in leg_ik.
+    """
+
+    def __init__(self, leg_ids=LEG_IDS, body_length=BODY_LENGTH, body_width=BODY_WIDTH,
+                 hip_x_shift=HIP_X_SHIFT, hip_offset=HIP_OFFSET, thigh_length=THIGH_LENGTH,
+                 shin_length=SHIN_LENGTH):
+        self.leg_ids = tuple(leg_ids)
+        self.body_length = body_length
+        self.body_width = body_width
+        self.hip_x_shift = hip_x_shift
+        self.hip_offset = hip_offset
+        self.thigh_length = thigh_length
+        self.shin_length = shin_length
+        self.masks = leg_masks(self.leg_ids)
+        self.sides = tuple(float(v) for v in self.masks[0])
+        self.ends = tuple(float(v) for v in self.masks[1])
+
+        # Terms of the shin law of cosines
+        self.link_squares = thigh_length ** 2 + shin_length ** 2
+        self.link_product = 2 * thigh_length * shin_length
+
+        # Hip-to-foot distance range in the leg plane (folded to straight)
+        self.reach_min = abs(thigh_length - shin_length)
+        self.reach_max = thigh_length + shin_length
+        self.reach_min_squared = self.reach_min ** 2
+        self.reach_max_squared = self.reach_max ** 2
+        self.hip_offset_squared = hip_offset ** 2
+        self.level = PoseContext(self)
+
+    def pose(self, pitch=0, roll=0, masks=None):
+        """Per-tick pose context; the level pose is cached."""
+        if pitch == 0 and roll == 0 and masks is None:
+            return self.level
+        return PoseContext(self, pitch, roll, masks)
+
+
+class PoseContext:
+    """
+    Everything the leg solver needs from this tick's pitch and roll, computed
+    once for all legs: the per-leg sign masks and height offsets.
+    """
+
+    __slots__ = ("model", "pitch", "roll", "side", "end", "offsets", "height_offsets")
+
+    def __init__(self, model, pitch=0, roll=0, masks=None):
+        self.model = model
+        self.pitch = pitch
+        self.roll = roll
+        pitch_height = 0.5 * model.body_length * math.tan(math.radians(pitch))
+        roll_height = 0.5 * model.body_width * math.tan(math.radians(roll))
+
+        if masks is None:
+            # Per-leg height offsets as Python floats for the scalar solver,
+            # and as an array for the batch solver
+            self.side, self.end = model.masks
+            self.offsets = tuple(end * pitch_height + side * roll_height
+                                 for side, end in zip(model.sides, model.ends))
+            self.height_offsets = np.array(self.offsets)
+        else:
+            self.side, self.end = masks
+            self.height_offsets = self.end * pitch_height + self.side * roll_height
+            self.offsets = tuple(float(v) for v in np.ravel(self.height_offsets))
+
+
+DEFAULT_MODEL = RobotModel()
+
+
+def leg_frame(targets, pose=DEFAULT_MODEL.level):
+    """
+    Moves foot targets into the frame the IK core works in.
+    Mirrors x for left legs and applies the pose's pitch/roll height offsets.
+    Returns (u, y, w): mirrored x, y, and corrected z (still negative down).
+    """
+    targets = np.asarray(targets, dtype=float)
+    u = -pose.side * targets[..., 0]
+    w = targets[..., 2] + pose.height_offsets
+    return u, targets[..., 1], w
+
+
+def solve_core(u, y, w, model=DEFAULT_MODEL):
+    """
+    Analytic hip/thigh/shin solution in the leg frame from leg_frame().
+    Returns an array (..., 3) of angles in degrees before pitch/roll
+    compensation and right-leg mirroring.
+    """
+    # Hip offset adjustment, then invert z so negative is down
+    x = u + model.hip_x_shift
+    z = -w
+
+    # Hip calculations
+    d = np.sqrt(x ** 2 + z ** 2 - model.hip_offset ** 2)
+    hip = np.arctan(x / z) + np.arctan(d / model.hip_offset)
+
+    # Thigh and shin calculations
+    g = np.sqrt(d ** 2 + y ** 2)
+    shin_cos = (model.link_squares - g ** 2) / model.link_product
+    shin = np.arccos(np.clip(shin_cos, -1, 1))
+    # Clipped like shin_cos: rounding can push it just past 1 where the knee is a right angle
+    thigh = np.arctan(-y / d) + np.arcsin(np.clip(model.shin_length * np.sin(shin) / g, -1, 1))
+
+    core = np.empty(np.broadcast(x, y, z).shape + (3,))
+    core[..., 0] = np.degrees(hip)
+    core[..., 1] = 90 - np.degrees(thigh)
+    core[..., 2] = 180 - (np.degrees(shin) - 45)
+    return core
+
+
+def finish_angles(core, pose=DEFAULT_MODEL.level):
+    """
+    Applies pitch/roll compensation and right-leg mirroring to core angles.
+    Modifies core in place and returns it.
+    """
+    core[..., 0] += pose.side * pose.roll   # Roll compensation for hip
+    core[..., 1] += pose.pitch              # Pitch compensation for thigh
+
+    # Mirror angles for right legs
+    right = np.broadcast_to(pose.side < 0, core.shape[:-1])
+    core[right] = 180 - core[right]
+    return core
+
+
+def batch_leg_ik(targets, masks=None, pitch=0, roll=0, pose=None):
+    """
+    Vectorized version of leg_ik for many legs at once.
+    targets: array (..., 3) of (x, y, z) foot targets, one row per leg.
+    masks: (side, end) sign arrays from leg_masks(), broadcast against targets[..., 0].
+    pose: PoseContext from RobotModel.pose(); built from pitch/roll/masks if not given.
+    Returns an array (..., 3) of (hip, thigh, shin) angles in degrees.
+    """
+    if pose is None:
+        pose = DEFAULT_MODEL.pose(pitch, roll, masks)
+    core = solve_core(*leg_frame(targets, pose), pose.model)
+    return finish_angles(core, pose)
+
+
+def project_reachable(u, y, w, model=DEFAULT_MODEL):
+    """
+    Moves leg-frame points from leg_frame() onto the leg's reachable set, so
+    solve_core never sees a negative sqrt, a zero division or a clamped acos:
+      - the foot is kept at least MIN_FOOT_DEPTH below the hip axis
+      - the leg-plane distance d is kept at least MIN_LEG_SPAN
+      - the hip-to-foot distance is scaled into [reach_min, reach_max] in the leg plane
+    Returns (u, y, w, valid); valid is False where a point had to be moved.
+    """
+    u, y, w = np.broadcast_arrays(np.asarray(u, dtype=float), np.asarray(y, dtype=float),
+                                  np.asarray(w, dtype=float))
+    x = u + model.hip_x_shift
+    z = -w
+
+    # Cheap check with the precomputed squared limits; most ticks stop here
+    rho_squared = x ** 2 + z ** 2
+    d_squared = rho_squared - model.hip_offset_squared
+    g_squared = d_squared + y ** 2
+    tolerance = REACH_TOLERANCE
+    valid = ((z >= MIN_FOOT_DEPTH - tolerance) & (d_squared >= MIN_LEG_SPAN ** 2 - tolerance)
+             & (g_squared >= model.reach_min_squared - tolerance)
+             & (g_squared <= model.reach_max_squared + tolerance))
+    if valid.all():
+        return u, y, w, valid
+
+    # Leg plane: d across, y along; g is the hip-to-foot distance
+    z = np.maximum(z, MIN_FOOT_DEPTH)
+    rho = np.sqrt(x ** 2 + z ** 2)
+    d = np.maximum(np.sqrt(np.maximum(rho ** 2 - model.hip_offset_squared, 0)), MIN_LEG_SPAN)
+    g = np.sqrt(d ** 2 + y ** 2)
+    scale = np.clip(g, model.reach_min, model.reach_max) / g
+    d_new = d * scale
+    y_new = y * scale
+
+    # Scaling down can pull d under the minimum when y dominates: slide along the reach limit
+    short = d_new < MIN_LEG_SPAN
+    d_new = np.where(short, MIN_LEG_SPAN, d_new)
+    y_new = np.where(short, np.copysign(np.sqrt(model.reach_max_squared - MIN_LEG_SPAN ** 2), y), y_new)
+
+    # Back to x, z along the original hip direction, keeping the foot depth
+    rho_new = np.sqrt(d_new ** 2 + model.hip_offset_squared)
+    z_new = np.maximum(z * (rho_new / rho), MIN_FOOT_DEPTH)
+    x_new = np.copysign(np.sqrt(np.maximum(rho_new ** 2 - z_new ** 2, 0)), x)
+
+    u = np.where(valid, u, x_new - model.hip_x_shift)
+    y = np.where(valid, y, y_new)
+    w = np.where(valid, w, -z_new)
+    return u, y, w, valid
+
+
+def safe_batch_leg_ik(targets, masks=None, pitch=0, roll=0, pose=None):
+    """
+    batch_leg_ik that never raises or returns NaN: out-of-reach targets are
+    projected onto the nearest reachable point first (see project_reachable).
+    Returns (angles, valid), valid (...,) False for legs whose target was moved.
+    """
+    if pose is None:
+        pose = DEFAULT_MODEL.pose(pitch, roll, masks)
+    u, y, w, valid = project_reachable(*leg_frame(targets, pose), pose.model)
+    core = solve_core(u, y, w, pose.model)
+    return finish_angles(core, pose), valid
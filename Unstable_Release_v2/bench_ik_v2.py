@@ -0,0 +1,115 @@
+import argparse
+import sys
+import time
+import numpy as np
+from batch_ik import (batch_leg_ik, safe_batch_leg_ik, leg_frame, project_reachable,
+                      DEFAULT_MODEL, LEG_IDS, JOINTS)
+from batch_fk import batch_leg_fk
+from leg_ik import solve_leg
+from ik_table import IKTable, X_RANGE, Y_RANGE, Z_RANGE
+from ik_memo import IKMemo
+
+# Sweeps the foot workspace for all four legs and reports, for each IK backend,
+# solve throughput and the round-trip position error |fk(ik(target)) - target|.
+# Targets out of reach (past full extension, or folded tighter than the links
+# allow) are reported separately: the IK clamps them, so their round-trip error
+# is how far the foot actually ends up from the target.
+# Backends that project targets into reach must never return NaN; the run fails if they do.
+
+SAFE_BACKENDS = ("safe", "memo")
+
+
+def workspace_targets(samples=5000, seed=0):
+    """
+    Random targets over the controller's workspace box, as (N, legs, 3).
+    Random rather than a grid, so table backends are not sampled at their own nodes.
+    """
+    rng = np.random.default_rng(seed)
+    lows, highs = np.array((X_RANGE, Y_RANGE, Z_RANGE)).T
+    return rng.uniform(lows, highs, (samples, len(LEG_IDS), 3))
+
+
+def reachable(targets, pose):
+    """
+    True where the target is within the leg's reach (no clamping in the IK):
+    the validity test of project_reachable, so too-tight folds count as out of reach too.
+    """
+    return project_reachable(*leg_frame(targets, pose), pose.model)[3]
+
+
+def scalar_ik(targets, pose):
+    """solve_leg (leg_ik) one leg at a time; targets it raises on come back as NaN."""
+    angles = np.full(targets.shape, np.nan)
+    for n, row in enumerate(targets):
+        for i in range(len(LEG_IDS)):
+            try:
+                result = solve_leg(*row[i], i, pose)
+            except (ValueError, ZeroDivisionError):
+                continue
+            angles[n, i] = [result[joint] for joint in JOINTS]
+    return angles
+
+
+def batch_ik(targets, pose):
+    return batch_leg_ik(targets, pose=pose)
+
+
+def safe_ik(targets, pose):
+    return safe_batch_leg_ik(targets, pose=pose)[0]
+
+
+def memo_ik(targets, pose):
+    """IKMemo one tick (4 legs) at a time. The sweep never repeats a target, so this is the miss cost."""
+    memo = IKMemo()
+    return np.array([memo.safe_solve(row, pose=pose)[0] for row in targets])
+
+
+def make_backends(table=None):
+    """Backend name -> solve(targets, pose). table: an IKTable to include."""
+    backends = {"scalar": scalar_ik, "batch": batch_ik, "safe": safe_ik, "memo": memo_ik}
+    if table is not None:
+        backends["lut"] = lambda targets, pose: table.solve(targets, pose=pose)
+    return backends
+
+
+def run(samples=5000, pitch=0, roll=0, table_path=None, repeats=3):
+    """Prints one line per backend. Returns False if a SAFE_BACKENDS backend returned NaN."""
+    pose = DEFAULT_MODEL.pose(pitch, roll)
+    targets = workspace_targets(samples)
+    inside = reachable(targets, pose)
+    legs = targets.shape[0] * targets.shape[1]
+    table = IKTable(table_path) if table_path else None
+    print(f"{legs} leg targets, pitch={pitch} roll={roll}, {np.count_nonzero(~inside)} out of reach")
+    ok = True
+
+    for name, solve in make_backends(table).items():
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            angles = solve(targets, pose)
+            best = min(best, time.perf_counter() - start)
+
+        error = np.linalg.norm(batch_leg_fk(angles, pose=pose) - targets, axis=-1)
+        failed = np.count_nonzero(np.isnan(error))
+        reach_error = error[inside & ~np.isnan(error)]
+        clamp_error = error[~inside & ~np.isnan(error)]
+        print(f"{name:>7}: {legs / best / 1000:9.1f} k legs/s  "
+              f"round trip max {reach_error.max():.2e} cm, p99 {np.percentile(reach_error, 99):.2e} cm  "
+              f"clamped max {clamp_error.max() if clamp_error.size else 0:.2f} cm  failed {failed}")
+        if name in SAFE_BACKENDS and np.isnan(angles).any():
+            print(f"FAIL: {name} returned NaN for {np.count_nonzero(np.isnan(angles).any(axis=-1))} legs")
+            ok = False
+    if table is not None:
+        print(f"    lut: {table.fallbacks // repeats} legs solved analytically (not served by the table)")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="IK throughput and round-trip accuracy per backend.")
+    parser.add_argument("--samples", type=int, default=5000, help="targets per leg")
+    parser.add_argument("--pitch", type=float, default=0)
+    parser.add_argument("--roll", type=float, default=0)
+    parser.add_argument("--table", help="IK table file (from ik_table.py) to include")
+    args = parser.parse_args()
+
+    sys.exit(0 if run(args.samples, args.pitch, args.roll, args.table) else 1)
@@ -0,0 +1,98 @@
+import argparse
+import sys
+import send_servo
+from servo_backend import make_backend
+from clock import MonotonicClock, SimulatedClock
+from joystick_input import ScriptedInput
+import controller
+from controller import MODE_TOGGLE_BUTTON
+
+# Runs the real controller loop (controller.run) against a mock servo backend,
+# with a scripted joystick instead of pygame and no lightbar, and reports bus
+# traffic per tick. With simulated=True the loop runs on a SimulatedClock, so
+# ticks run back to back faster than real time.
+#
+# --check drives the loop through every mode switch with the sticks deflected,
+# with and without the trajectory cache, and fails if any servo moves more than
+# MAX_TICK_COUNTS in one tick.
+
+# Mode toggle presses from the start mode (translate)
+MODE_PRESSES = {"translate": 0, "rotate": 1, "walk": 2}
+
+# Largest change of one servo's OFF count allowed between two ticks in --check
+# (about 7 degrees; steady motion at 50 Hz stays well below it)
+MAX_TICK_COUNTS = 100
+
+def run(backend_name="latency-400k", mode="walk", ticks=250, rate=50, ry=-1.0, simulated=False):
+    backend = make_backend(backend_name)
+    send_servo.set_backend(backend)
+    send_servo.reset_write_stats()
+    controller.CONTROL_RATE_HZ = rate
+
+    clock = SimulatedClock() if simulated else MonotonicClock()
+    joystick = ScriptedInput(clock=clock)
+    joystick.set_axis(4, ry)
+    for _ in range(MODE_PRESSES[mode]):
+        joystick.press(MODE_TOGGLE_BUTTON)
+
+    print(f"Backend {backend_name}, mode {mode}, {ticks} ticks at {rate} Hz")
+    controller.run(joystick, clock=clock, ticks=ticks)
+    print(f"Bus: {len(backend.writes) / ticks:.2f} transactions/tick, "
+          f"{backend.bytes_written() / ticks:.1f} bytes/tick")
+    if hasattr(backend, "bus_time"):
+        print(f"Simulated bus time: {backend.bus_time / ticks * 1000:.3f} ms/tick")
+    return backend
+
+def check(rate=50, segment_ticks=100):
+    """
+    Translate -> rotate -> walk -> translate with both sticks deflected (legs
+    kept in reach), on the mock backend and a simulated clock. Returns (largest per-tick count change,
+    tick) for each trajectory cache setting.
+    """
+    worst = {}
+    for use_cache in (False, True):
+        send_servo.set_backend(make_backend("mock"))
+        controller.CONTROL_RATE_HZ = rate
+        controller.USE_TRAJECTORY_CACHE = use_cache
+        controller.PROFILE_TICKS = False
+
+        clock = SimulatedClock()
+        joystick = ScriptedInput(clock=clock)
+        for axis, value in ((0, 0.5), (1, -0.3), (3, -0.5), (4, 0.5)):
+            joystick.set_axis(axis, value)
+
+        last = {}
+        jumps = []
+
+        def on_tick(tick, channels, counts):
+            if tick % segment_ticks == 0:
+                joystick.press(MODE_TOGGLE_BUTTON)
+            # From the first switch on; before it the legs settle onto the deflected sticks
+            if tick > segment_ticks:
+                jumps.append((max(abs(c - last[ch]) for ch, c in zip(channels, counts)), tick))
+            last.update(zip(channels, counts))
+
+        controller.run(joystick, clock=clock, ticks=4 * segment_ticks, on_tick=on_tick)
+        worst[use_cache] = max(jumps)
+    return worst
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the v2 control loop without hardware.")
+    parser.add_argument("--backend", default="latency-400k", help="mock, latency-100k or latency-400k")
+    parser.add_argument("--mode", default="walk", choices=sorted(MODE_PRESSES))
+    parser.add_argument("--ticks", type=int, default=250)
+    parser.add_argument("--rate", type=float, default=50, help="loop rate in Hz")
+    parser.add_argument("--simulated", action="store_true", help="run on a simulated clock")
+    parser.add_argument("--check", action="store_true", help="run the mode-switch regression check")
+    args = parser.parse_args()
+
+    if args.check:
+        failed = False
+        for use_cache, (jump, tick) in check(args.rate).items():
+            ok = jump <= MAX_TICK_COUNTS
+            failed |= not ok
+            print(f"{'PASS' if ok else 'FAIL'}: trajectory cache {'on' if use_cache else 'off'}, "
+                  f"largest per-tick change {jump} counts (tick {tick}, limit {MAX_TICK_COUNTS})")
+        sys.exit(1 if failed else 0)
+
+    run(args.backend, args.mode, args.ticks, args.rate, simulated=args.simulated)
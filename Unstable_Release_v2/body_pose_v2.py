@@ -0,0 +1,63 @@
+import math
+import numpy as np
+from batch_ik import BODY_LENGTH, BODY_WIDTH, HIP_X_SHIFT, DEFAULT_MASKS
+
+# Frame: x to the right, y forward, z up (as the leg targets). Angle signs follow
+# leg_ik: positive pitch lowers the front, positive roll lowers the left side,
+# positive yaw turns counter-clockwise seen from above.
+
+def rotation_matrix(roll=0, pitch=0, yaw=0):
+    """
+    Body orientation as a 3x3 matrix (degrees in), applied as roll, then pitch, then yaw.
+    """
+    cr, sr = math.cos(math.radians(-roll)), math.sin(math.radians(-roll))
+    cp, sp = math.cos(math.radians(-pitch)), math.sin(math.radians(-pitch))
+    cy, sy = math.cos(math.radians(yaw)), math.sin(math.radians(yaw))
+
+    # Roll about y (forward), pitch about x (right), yaw about z (up)
+    r_roll = np.array([[cr, 0, sr], [0, 1, 0], [-sr, 0, cr]])
+    r_pitch = np.array([[1, 0, 0], [0, cp, -sp], [0, sp, cp]])
+    r_yaw = np.array([[cy, -sy, 0], [sy, cy, 0], [0, 0, 1]])
+    return r_yaw @ r_pitch @ r_roll
+
+class BodyPose:
+    """
+    Exact 6-DOF body pose for all legs at once.
+
+    Foot targets are given relative to each hip with the body level. set_pose()
+    builds the rotation once per tick; transform() moves every foot into the
+    posed body frame with one matrix multiply, so the result goes straight to the
+    IK with pitch=roll=0. Replaces the tan() height offsets and angle compensation
+    in leg_ik, which approximate this to first order (and for roll take the
+    lever arm from the hip axis rather than the foot).
+    """
+
+    def __init__(self, masks=DEFAULT_MASKS):
+        side, end = masks
+        # Origin of each leg's targets in the body frame: the neutral foot sits
+        # HIP_X_SHIFT outboard of the hip axis, at hip height
+        self.hips = np.zeros((len(side), 3))
+        self.hips[:, 0] = -side * (BODY_WIDTH / 2 + HIP_X_SHIFT)
+        self.hips[:, 1] = end * BODY_LENGTH / 2
+        self.rotation = np.eye(3)
+        self.translation = np.zeros(3)
+        self.out = np.zeros((len(side), 3))
+        self._feet = np.zeros((len(side), 3))
+
+    def set_pose(self, roll=0, pitch=0, yaw=0, translation=(0, 0, 0)):
+        """Body orientation (degrees) and translation (cm) for this tick."""
+        self.rotation = rotation_matrix(roll, pitch, yaw)
+        self.translation[:] = translation
+
+    def transform(self, targets):
+        """
+        Hip-relative foot targets (legs, 3) in the level frame -> hip-relative
+        targets in the posed body frame. The returned array is reused between calls.
+        """
+        feet = self._feet
+        np.add(self.hips, targets, out=feet)
+        feet -= self.translation
+        # Row vectors: R^T p for every foot is feet @ R
+        np.matmul(feet, self.rotation, out=self.out)
+        self.out -= self.hips
+        return self.out
@@ -0,0 +1,30 @@
+import time
+
+class MonotonicClock:
+    """
+    Real time from time.monotonic(), which wall-clock (NTP) changes cannot move.
+    """
+
+    def now(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+class SimulatedClock:
+    """
+    Clock that only moves when told to, for running the gait and loop
+    faster than real time. Sleeping advances the clock instead of waiting.
+    """
+
+    def __init__(self, start=0.0):
+        self.time = start
+
+    def now(self):
+        return self.time
+
+    def advance(self, seconds):
+        self.time += seconds
+
+    def sleep(self, seconds):
+        self.advance(seconds)
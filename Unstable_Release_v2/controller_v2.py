@@ -1,9 +1,24 @@
-import pygame
-import time
-from leg_ik import leg_ik
-from send_servo import set_servo, safe_set_servo
-from dualsense_controller import DualSenseController
-from interpolation import Interpolator
+import numpy as np
+from batch_ik import batch_leg_ik, safe_batch_leg_ik, solve_core, DEFAULT_MODEL, LEG_IDS
+from ik_table import IKTable
+from ik_memo import IKMemo
+from gait_table import GaitTable
+from gait_engine import GaitEngine
+from footstep_planner import FootstepPlanner
+from transition import TransitionBlender
+from body_pose import BodyPose
+from robot_state import RobotState
+from swing_profiles import SWING_PROFILES
+from trajectory_cache import TrajectoryCache
+from send_servo import write_stats
+from servo_writer import ServoWriter
+from rate_scheduler import RateScheduler
+from realtime import enable_realtime, SlackCollector, measure_jitter
+from tick_profiler import TickProfiler
+from led_manager import LightbarManager
+from joystick_input import JoystickInput
+from clock import MonotonicClock
+from interpolation import SmoothInterpolator
 import gait
 
 # === CONSTANTS ===
@@ -11,10 +26,13 @@ MODE_TRANSLATE = "translate"
 MODE_ROTATE = "rotate"
 MODE_WALK = "walk"
 MODE_TOGGLE_BUTTON = 1
+GAIT_TOGGLE_BUTTON = 2
 
 BASE_HEIGHT = -16
 
-SMOOTHING_SPEED = 0.2
+# Translate/rotate body position smoothing time constant (s); matches the old
+# per-tick factor of 0.2 at 50 Hz
+POSE_SMOOTHING_TIME_CONSTANT = 0.0896
 DEADZONE = 0.05
 
 X_MIN, X_MAX = -10, 10
@@ -25,6 +43,73 @@ ROLL_MIN, ROLL_MAX = -20, 20
 YAW_MIN, YAW_MAX = -20, 20
 STEP_LENGTH_MIN, STEP_LENGTH_MAX = -5, 5
 
+# Control loop rate (Hz) and what to do when a tick overruns ("skip" or "catch_up")
+CONTROL_RATE_HZ = 50
+OVERRUN_POLICY = "skip"
+
+# Real-time mode for the control thread (GC in slack time, CPU pinning,
+# SCHED_FIFO or nice, mlockall); steps that are not permitted are skipped.
+# Wake-up jitter is measured over JITTER_SAMPLE_TICKS before and after.
+REALTIME = False
+REALTIME_CPU = 3
+REALTIME_PRIORITY = 50
+REALTIME_NICE = -10
+JITTER_SAMPLE_TICKS = 100
+
+# Per-stage tick timing, summarised on exit
+PROFILE_TICKS = True
+PROFILE_STAGES = ("input", "joystick", "mode", "gait", "interpolate", "ik", "servo_out", "tick")
+
+# Swing foot path: None for the original square step, or a name from SWING_PROFILES
+# ("min_jerk"/"bezier" are smooth, so the time constant below can be lowered)
+SWING_PROFILE = None
+
+# Walk target smoothing: time constant (s) and "exponential" or "critical"
+INTERPOLATION_TIME_CONSTANT = 0.0166
+INTERPOLATION_MODE = "exponential"
+
+# Use the precompiled crawl cycle instead of evaluating the gait every tick
+USE_GAIT_TABLE = True
+
+# Walk gait: None for the GaitController crawl (gait table / trajectory cache below),
+# or a name from gait_engine.GAITS. With the engine, GAIT_TOGGLE_BUTTON cycles
+# through GAIT_CYCLE while walking.
+WALK_GAIT = None
+GAIT_CYCLE = ("crawl", "trot")
+
+# Omnidirectional walking: right stick strafes/walks, left stick x turns.
+# Uses WALK_GAIT (crawl if None). Speeds are sized for the crawl; commands that
+# would move a foot more than footstep_planner.MAX_STRIDE per stance are scaled down.
+USE_FOOTSTEP_PLANNER = False
+MAX_WALK_SPEED = 1.2     # cm/s
+MAX_STRAFE_SPEED = 0.6   # cm/s
+MAX_YAW_RATE = 4         # deg/s
+
+# Cross-fade window (s) for leg targets and body pose on mode and gait changes, and
+# the cycle phase (0–1) the gait restarts at when entering walk mode
+TRANSITION_WINDOW = 0.5
+WALK_ENTRY_PHASE = 0.0
+
+# Replay baked servo frames while walking (skips gait, interpolation and IK per tick;
+# step length is rounded to trajectory_cache.STEP_QUANTUM)
+USE_TRAJECTORY_CACHE = False
+
+# Body offsets applied to all leg positions (cm)
+COG_X_OFFSET = 0
+COG_Y_OFFSET = 2  # Try positive or negative values to see the effect
+
+# Reuse IK solutions for unchanged leg targets in translate/rotate mode, where a
+# pose is often held; targets are quantized to this (cm). None disables. Walking
+# changes every target every tick, so it always solves directly.
+IK_MEMO_RESOLUTION = 0.01
+
+# Exact body pose (one rotation for all feet, then IK without pitch/roll terms);
+# False uses leg_ik's pitch/roll approximation. Rotate mode also yaws with this on.
+USE_BODY_POSE = True
+
+# Precomputed IK table (build with ik_table.py); None uses the analytic IK
+IK_TABLE_PATH = None
+
 CHANNEL_MAP = {
     "FL": {"hip": 8, "thigh": 9, "shin": 10},
     "FR": {"hip": 12, "thigh": 13, "shin": 14},
@@ -56,6 +141,17 @@ def calculate_offset(angle, ratio=1.0, cap=5.9):
     offset = angle * ratio
     return max(min(offset, cap), -cap)
 
+def servo_frame(leg_angles):
+    """
+    Map an (legs, 3) angle array in LEG_IDS order to a dict channel -> angle.
+    """
+    frame = {}
+    for leg_id, (hip, thigh, shin) in zip(LEG_IDS, leg_angles):
+        frame[CHANNEL_MAP[leg_id]["hip"]] = hip
+        frame[CHANNEL_MAP[leg_id]["thigh"]] = thigh
+        frame[CHANNEL_MAP[leg_id]["shin"]] = shin
+    return frame
+
 # === MODE HANDLERS ===
 def handle_translate(rx, ry, ly):
     pos_x = map_range(rx, -1, 1, X_MIN, X_MAX)
@@ -66,7 +162,14 @@ def handle_translate(rx, ry, ly):
 def handle_rotate(joystick):
     pitch = map_joystick_separate(joystick.get_axis(4), PITCH_MIN, PITCH_MAX)
     roll = -map_range(joystick.get_axis(0), -1, 1, ROLL_MIN, ROLL_MAX)
-    return 0, 0, BASE_HEIGHT, pitch, roll, 0
+    yaw = -map_range(joystick.get_axis(3), -1, 1, YAW_MIN, YAW_MAX)
+    return 0, 0, BASE_HEIGHT, pitch, roll, yaw
+
+def walk_command(lx, rx, ry):
+    vx = -rx * MAX_STRAFE_SPEED
+    vy = -ry * MAX_WALK_SPEED
+    yaw_rate = -lx * MAX_YAW_RATE
+    return vx, vy, yaw_rate
 
 def handle_walk(ry, gait_controller):
     step_length = -map_range(ry, -1, 1, STEP_LENGTH_MIN, STEP_LENGTH_MAX)
@@ -75,6 +178,10 @@ def handle_walk(ry, gait_controller):
 
 # === MAIN CONTROLLER ===
 def main():
+    # Hardware/UI libraries are only needed on the robot
+    import pygame
+    from dualsense_controller import DualSenseController
+
     # Initialize
     pygame.init()
     pygame.joystick.init()
@@ -83,100 +190,261 @@ def main():
 
     controller_led = DualSenseController()
     controller_led.activate()
+    lightbar = LightbarManager(controller_led)
+
+    clock = MonotonicClock()
+    # Joystick events are read on their own thread from here on
+    joystick_input = JoystickInput(joystick, clock=clock)
+    run(joystick_input, lightbar, clock)
+
+def run(joystick_input, lightbar=None, clock=None, ticks=None, on_tick=None):
+    """
+    The control loop, on the configured servo backend.
+    joystick_input: JoystickInput, or any source with its latest()/pop_edges()/stop()
+    lightbar: LightbarManager, or None to skip the mode colors
+    ticks: stop after this many ticks (None runs until Ctrl+C)
+    on_tick(tick, channels, counts), if given, is called with each published servo frame.
+    Stops early if the servo writer fails; prints the loop statistics on exit.
+    """
+    clock = clock or MonotonicClock()
+    set_color = lightbar.set_color if lightbar is not None else lambda r, g, b: None
 
-    interpolator = Interpolator(step_time=0.005, speed=0.7)
-    gait_controller = gait.GaitController()
+    servo_writer = ServoWriter()
+    ik_table = IKTable(IK_TABLE_PATH) if IK_TABLE_PATH else None
+    solve_ik = ik_table.solve if ik_table else batch_leg_ik
+    # Loop IK: out-of-reach targets are projected instead of raising or clamping
+    safe_solve_ik = ik_table.safe_solve if ik_table else safe_batch_leg_ik
+    ik_memo = None
+    if IK_MEMO_RESOLUTION:
+        ik_memo = IKMemo(IK_MEMO_RESOLUTION, solve_core=ik_table.solve_core if ik_table else solve_core)
+    projected_legs = 0
+
+    interpolator = SmoothInterpolator(INTERPOLATION_TIME_CONSTANT, INTERPOLATION_MODE, clock=clock)
+    swing_profile = SWING_PROFILES[SWING_PROFILE]() if SWING_PROFILE else None
+    gait_controller = gait.GaitController(clock=clock, swing_profile=swing_profile)
+    gait_table = GaitTable(gait_controller) if USE_GAIT_TABLE or USE_TRAJECTORY_CACHE else None
+    gait_engine = None
+    if USE_FOOTSTEP_PLANNER:
+        gait_engine = FootstepPlanner(WALK_GAIT or "crawl", clock=clock, lift_height=gait_controller.LIFT_HEIGHT)
+    elif WALK_GAIT:
+        gait_engine = GaitEngine(WALK_GAIT, clock=clock, lift_height=gait_controller.LIFT_HEIGHT)
+    trajectory_cache = None
+    if USE_TRAJECTORY_CACHE and gait_engine is None:
+        trajectory_cache = TrajectoryCache(
+            gait_controller, gait_table, CHANNEL_MAP, rate_hz=CONTROL_RATE_HZ,
+            time_constant=INTERPOLATION_TIME_CONSTANT, interpolation_mode=INTERPOLATION_MODE,
+            target_offset=(COG_X_OFFSET, COG_Y_OFFSET, 0), solve_ik=solve_ik
+        )
+
+    blender = TransitionBlender(TRANSITION_WINDOW, clock=clock)
+    state = RobotState(CHANNEL_MAP)
+    body_pose = BodyPose() if USE_BODY_POSE else None
 
     mode = MODE_TRANSLATE
-    mode_toggle_ready = True
+    previous_mode = mode
+    entering_walk = False
+    last_input_stamp = joystick_input.latest().stamp
+    input_latency_total = 0.0
+    input_latency_max = 0.0
+    input_samples = 0
 
     pos_x = pos_y = 0
     pos_z = BASE_HEIGHT
-    smoothed_pos_x = pos_x
-    smoothed_pos_y = pos_y
-    smoothed_pos_z = pos_z
+    # Body position for translate/rotate, smoothed with the real elapsed time
+    pose_smoother = SmoothInterpolator(POSE_SMOOTHING_TIME_CONSTANT, num_legs=1, clock=clock)
+    pose_target = np.zeros((1, 3))
+
+    if REALTIME:
+        before = measure_jitter(CONTROL_RATE_HZ, JITTER_SAMPLE_TICKS)
+        for line in enable_realtime(REALTIME_CPU, REALTIME_PRIORITY, REALTIME_NICE):
+            print(f"Realtime {line}")
+        after = measure_jitter(CONTROL_RATE_HZ, JITTER_SAMPLE_TICKS)
+        print(f"Wake jitter before: mean {before[0] * 1000:.3f} ms, max {before[1] * 1000:.3f} ms; "
+              f"after: mean {after[0] * 1000:.3f} ms, max {after[1] * 1000:.3f} ms")
 
+    scheduler = RateScheduler(CONTROL_RATE_HZ, OVERRUN_POLICY, clock=clock.now, sleep=clock.sleep)
+    scheduler.start()
+    pose_smoother.reset(((pos_x, pos_y, pos_z),))
+    gc_collector = SlackCollector(scheduler.period) if REALTIME else None
+    profiler = TickProfiler(PROFILE_STAGES, enabled=PROFILE_TICKS)
+
+    tick = 0
     try:
-        while True:
-            pygame.event.pump()
-            pressed = joystick.get_button(MODE_TOGGLE_BUTTON)
-
-            # Set your desired offsets here
-            cog_x_offset = 0
-            cog_y_offset = 2  # Try positive or negative values to see the effect
-
-            # Mode toggle logic
-            if pressed and mode_toggle_ready:
-                if mode == MODE_TRANSLATE:
-                    mode = MODE_ROTATE
-                elif mode == MODE_ROTATE:
-                    mode = MODE_WALK
-                else:
-                    mode = MODE_TRANSLATE
-                mode_toggle_ready = False
-            elif not pressed:
-                mode_toggle_ready = True
+        while ticks is None or tick < ticks:
+            tick += 1
+            if servo_writer.error is not None:
+                print("Servo writer failed, stopping")
+                break
+            tick_start = t = profiler.start()
+            joystick_state = joystick_input.latest()
+            edges = joystick_input.pop_edges()
+            t = profiler.record("input", t)
+
+            cog_x_offset = COG_X_OFFSET
+            cog_y_offset = COG_Y_OFFSET
+
+            # Button presses since the last tick: mode toggle, and gait toggle
+            # (walk mode, gait engine only)
+            for button, pressed, _ in edges:
+                if not pressed:
+                    continue
+                if button == MODE_TOGGLE_BUTTON:
+                    if mode == MODE_TRANSLATE:
+                        mode = MODE_ROTATE
+                    elif mode == MODE_ROTATE:
+                        mode = MODE_WALK
+                    else:
+                        mode = MODE_TRANSLATE
+                elif button == GAIT_TOGGLE_BUTTON and mode == MODE_WALK and gait_engine is not None:
+                    current = GAIT_CYCLE.index(gait_engine.spec.name) if gait_engine.spec.name in GAIT_CYCLE else -1
+                    gait_engine.set_gait(GAIT_CYCLE[(current + 1) % len(GAIT_CYCLE)])
+                    blender.begin()
+
+            # Blend out of the previous mode; start walking at a known phase
+            if mode != previous_mode:
+                blender.begin()
+                if mode == MODE_WALK:
+                    gait_controller.restart(WALK_ENTRY_PHASE)
+                    if gait_engine is not None:
+                        gait_engine.restart(WALK_ENTRY_PHASE)
+                    entering_walk = True
+                previous_mode = mode
 
             # Read joystick axes
-            rx = apply_deadzone(-joystick.get_axis(3))
-            ry = apply_deadzone(joystick.get_axis(4))
-            ly = apply_deadzone(-joystick.get_axis(1))
+            rx = apply_deadzone(-joystick_state.get_axis(3))
+            ry = apply_deadzone(joystick_state.get_axis(4))
+            ly = apply_deadzone(-joystick_state.get_axis(1))
+            lx = apply_deadzone(joystick_state.get_axis(0))
+            t = profiler.record("joystick", t)
 
             # Mode handling
             if mode == MODE_TRANSLATE:
                 pos_x, pos_y, pos_z, pitch, roll, yaw = handle_translate(rx, ry, ly)
-                controller_led.lightbar.set_color(0, 180, 60)
+                set_color(0, 180, 60)
             elif mode == MODE_ROTATE:
-                pos_x, pos_y, pos_z, pitch, roll, yaw = handle_rotate(joystick)
-                controller_led.lightbar.set_color(255, 200, 50)
+                pos_x, pos_y, pos_z, pitch, roll, yaw = handle_rotate(joystick_state)
+                set_color(255, 200, 50)
             elif mode == MODE_WALK:
                 pos_x, pos_y, pos_z, pitch, roll, yaw = handle_walk(ry, gait_controller)
-                controller_led.lightbar.set_color(255, 0, 0)
+                if USE_FOOTSTEP_PLANNER:
+                    gait_engine.set_command(*walk_command(lx, rx, ry))
+                set_color(255, 0, 0)
                 # IMU/CoG compensation could be added here if needed
                 # cog_x_offset = 0
                 # cog_y_offset = 0
 
+            t = profiler.record("mode", t)
+
             # Smoothing
-            smoothed_pos_x += (pos_x - smoothed_pos_x) * SMOOTHING_SPEED
-            smoothed_pos_y += (pos_y - smoothed_pos_y) * SMOOTHING_SPEED
-            smoothed_pos_z += (pos_z - smoothed_pos_z) * SMOOTHING_SPEED
+            pose_target[0] = (pos_x, pos_y, pos_z)
+            smoothed_pos_x, smoothed_pos_y, smoothed_pos_z = pose_smoother.update(pose_target)[0]
 
-            # Target leg positions
+            # Steady walking: replay the baked servo frame for this phase
+            # (the live path below runs while a transition is blending, and
+            # until the cache's background thread has baked the first cycle)
+            frame = None
+            if mode == MODE_WALK and trajectory_cache is not None and not blender.active and not entering_walk:
+                frame = trajectory_cache.frame(gait_controller.crawl_phase(), gait_controller.STEP_LENGTH, BASE_HEIGHT)
+            if frame is not None:
+                servo_writer.publish_counts(frame)
+                if on_tick is not None:
+                    on_tick(tick, tuple(frame), tuple(frame.values()))
+                # Keep the blender's last frame current for the blend out of walk mode
+                blender.update(trajectory_cache.targets, angles=(roll, pitch, yaw))
+                t = profiler.record("servo_out", t)
+                profiler.record("tick", tick_start)
+                if gc_collector is not None:
+                    gc_collector.collect(scheduler.remaining())
+                scheduler.wait()
+                continue
+
+            # Target leg positions, (legs, 3) in LEG_IDS order, with global offsets applied
             if mode == MODE_WALK:
-                raw_targets = gait_controller.get_crawl_targets(
-                    pos_x, pos_y, BASE_HEIGHT, HIP_X_OFFSETS, interpolator.current_positions
-                )
-                target_leg_positions = interpolator.update(raw_targets)
-            else:
-                target_leg_positions = {}
-                for leg_id in ['FL', 'FR', 'BL', 'BR']:
-                    hip_offset = HIP_X_OFFSETS[leg_id]
-                    rel_x = smoothed_pos_x - hip_offset
-                    target_leg_positions[leg_id] = (rel_x, smoothed_pos_y, smoothed_pos_z)
-
-            # Apply global offsets to all leg positions
-            for leg_id in target_leg_positions:
-                x, y, z = target_leg_positions[leg_id]
-                x += cog_x_offset
-                y += cog_y_offset
-                target_leg_positions[leg_id] = (x, y, z)
-
-            # Send servo commands
-            for leg_id, (x, y, z) in target_leg_positions.items():
-                if mode == MODE_WALK:
-                    angles = leg_ik(x, y, z, leg_id, pitch, roll)
+                if USE_FOOTSTEP_PLANNER:
+                    raw_targets = gait_engine.update(pos_x, pos_y, BASE_HEIGHT)
+                elif gait_engine is not None:
+                    raw_targets = gait_engine.update(gait_controller.STEP_LENGTH, pos_x, pos_y, BASE_HEIGHT)
+                elif gait_table is not None:
+                    raw_targets = gait_table.lookup(
+                        gait_controller.crawl_phase(), gait_controller.STEP_LENGTH, pos_x, pos_y, BASE_HEIGHT
+                    )
                 else:
-                    offset_smoothed_pos_y = smoothed_pos_y + cog_y_offset
-                    angles = leg_ik(smoothed_pos_x, offset_smoothed_pos_y, smoothed_pos_z, leg_id, pitch, roll)
-                safe_set_servo(CHANNEL_MAP[leg_id]["hip"], angles["hip"])
-                safe_set_servo(CHANNEL_MAP[leg_id]["thigh"], angles["thigh"])
-                safe_set_servo(CHANNEL_MAP[leg_id]["shin"], angles["shin"])
+                    crawl_targets = gait_controller.get_crawl_targets(
+                        pos_x, pos_y, BASE_HEIGHT, HIP_X_OFFSETS, interpolator.current_positions
+                    )
+                    raw_targets = np.array([crawl_targets[leg_id] for leg_id in LEG_IDS])
+                if entering_walk:
+                    # Start from the gait pose; the blender covers the jump
+                    interpolator.reset(raw_targets)
+                    entering_walk = False
+                t = profiler.record("gait", t)
+                np.add(interpolator.update(raw_targets), (cog_x_offset, cog_y_offset, 0), out=state.targets)
+                t = profiler.record("interpolate", t)
+            else:
+                state.targets[:] = (smoothed_pos_x, smoothed_pos_y + cog_y_offset, smoothed_pos_z)
+
+            leg_targets = blender.update(state.targets, angles=(roll, pitch, yaw))
+            roll, pitch, yaw = blender.angles
+
+            # Solve IK for all four legs in one call
+            solve = ik_memo.safe_solve if ik_memo is not None and mode != MODE_WALK else safe_solve_ik
+            if body_pose is not None:
+                body_pose.set_pose(roll, pitch, yaw)
+                leg_angles, reachable = solve(body_pose.transform(leg_targets), pose=DEFAULT_MODEL.level)
+            else:
+                leg_angles, reachable = solve(leg_targets, pose=DEFAULT_MODEL.pose(pitch, roll))
+            state.joints[:] = leg_angles
+            projected_legs += len(LEG_IDS) - np.count_nonzero(reachable)
+            t = profiler.record("ik", t)
+
+            # Convert to OFF counts in place and hand a snapshot to the servo writer thread
+            state.update_outputs()
+            counts = state.counts.tolist()
+            servo_writer.publish_channel_counts(state.channels, counts)
+            if on_tick is not None:
+                on_tick(tick, state.channels, counts)
+            t = profiler.record("servo_out", t)
+
+            # Stick-to-servo latency: event arrival to the frame reaching the writer
+            if joystick_state.stamp != last_input_stamp:
+                latency = clock.now() - joystick_state.stamp
+                input_latency_total += latency
+                input_latency_max = max(input_latency_max, latency)
+                input_samples += 1
+                last_input_stamp = joystick_state.stamp
+            profiler.record("tick", tick_start)
 
-            time.sleep(0.02)
+            if gc_collector is not None:
+                gc_collector.collect(scheduler.remaining())
+            scheduler.wait()
 
     except KeyboardInterrupt:
-        controller_led.lightbar.set_color(0, 0, 0)
         print("Controller stopped by user")
+    finally:
+        joystick_input.stop()
+        if lightbar is not None:
+            lightbar.stop(final_color=(0, 0, 0))
+        servo_writer.stop()
+        if trajectory_cache is not None:
+            trajectory_cache.stop()
+        print(f"Loop: {scheduler.summary()}")
+        if gc_collector is not None:
+            print(f"GC: {gc_collector.summary()}")
+        print(f"Servo frames: {servo_writer.written} written, {servo_writer.dropped} dropped")
+        print(f"Servo writes: {write_stats['issued']} issued, {write_stats['skipped']} skipped")
+        print(f"IK: {projected_legs} leg targets projected into reach")
+        if ik_memo is not None:
+            print(f"IK memo: {ik_memo.summary()}")
+        if trajectory_cache is not None:
+            print(f"Trajectory cache: {trajectory_cache.hits} frames replayed, "
+                  f"{trajectory_cache.stale} from an older cycle while baking, {trajectory_cache.bakes} cycles baked")
+        if ik_table is not None:
+            print(f"IK table: {ik_table.fallbacks} leg solves not served by the table")
+        if input_samples:
+            print(f"Input latency: mean {input_latency_total / input_samples * 1000:.2f} ms, "
+                  f"max {input_latency_max * 1000:.2f} ms over {input_samples} samples")
+        if PROFILE_TICKS:
+            print(profiler.report())
 
 if __name__ == "__main__":
     main()
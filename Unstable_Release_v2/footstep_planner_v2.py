@@ -0,0 +1,132 @@
+import math
+import numpy as np
+from batch_ik import BODY_LENGTH, BODY_WIDTH, HIP_OFFSET, DEFAULT_MASKS
+from gait_engine import GaitEngine
+
+# Longest foot travel (cm) along the ground over one stance; commands are scaled
+# down to stay within it, and touch-down points are clamped to half of it
+MAX_STRIDE = 5.0
+
+class FootstepPlanner(GaitEngine):
+    """
+    Omnidirectional walking from a body velocity command (vx, vy, yaw_rate).
+
+    Uses the GaitEngine phase schedule, but instead of a fixed forward/back stride
+    each foot's foothold is updated incrementally every tick: stance feet move
+    opposite to the body's motion over dt (translation and yaw about the body
+    centre), and swing feet travel from where they lifted off to a touch-down
+    point placed half a stance ahead of the neutral position for the current
+    command. Command changes take effect on the next tick; work per tick is fixed.
+
+    Commands are scaled down (vx, vy and yaw_rate together) so that no foot
+    travels more than max_stride over a stance of the current gait.
+
+    Frame as for the leg targets: x to the right, y forward, z up; cm, cm/s, deg/s.
+    """
+
+    def __init__(self, gait="crawl", clock=None, lift_height=5, max_stride=MAX_STRIDE):
+        self.max_stride = max_stride
+        self.requested = self.command = (0.0, 0.0, 0.0)
+
+        # Neutral foot positions relative to the body centre
+        side, end = DEFAULT_MASKS
+        n = len(side)
+        self.neutral = np.zeros((n, 2))
+        self.neutral[:, 0] = -side * (BODY_WIDTH / 2 + HIP_OFFSET)
+        self.neutral[:, 1] = end * BODY_LENGTH / 2
+
+        super().__init__(gait, clock=clock, lift_height=lift_height)
+
+        # Foothold offsets from neutral, and where each swing started
+        self.feet = np.zeros((n, 2))
+        self.liftoff = np.zeros((n, 2))
+        self.touchdown = np.zeros((n, 2))
+        self.was_swing = np.zeros(n, dtype=bool)
+        self._points = np.zeros((n, 2))
+
+    def set_command(self, vx, vy, yaw_rate):
+        """Body velocity command: vx, vy in cm/s, yaw_rate in deg/s (counter-clockwise)."""
+        self.requested = (vx, vy, yaw_rate)
+        self.command = self._limit_command(vx, vy, yaw_rate)
+
+    def set_gait(self, gait):
+        """Switch gaits, re-limiting the command to the new stance time."""
+        super().set_gait(gait)
+        self.command = self._limit_command(*self.requested)
+
+    def _limit_command(self, vx, vy, yaw_rate):
+        """Scale the command so the fastest foot covers at most max_stride per stance."""
+        stance = self.spec.duty_factor * self.spec.cycle_time
+        yaw = math.radians(yaw_rate)
+        # Ground velocity under each foot: body translation plus yaw about the centre
+        speed = np.hypot(vx - yaw * self.neutral[:, 1], vy + yaw * self.neutral[:, 0]).max()
+        if speed * stance <= self.max_stride:
+            return (vx, vy, yaw_rate)
+        scale = self.max_stride / (speed * stance)
+        return (vx * scale, vy * scale, yaw_rate * scale)
+
+    def restart(self, phase=0.0):
+        """Restart the cycle at `phase` with all feet back at neutral."""
+        super().restart(phase)
+        self.feet[:] = 0
+        self.was_swing[:] = False
+
+    def _rotate(self, points, angle, out):
+        """Rotate (n, 2) points about the body centre by angle (radians) into out."""
+        c, s = math.cos(angle), math.sin(angle)
+        x = points[:, 0].copy()
+        out[:, 0] = c * x - s * points[:, 1]
+        out[:, 1] = s * x + c * points[:, 1]
+        return out
+
+    def _update_touchdown(self):
+        """Touch-down offsets: half a stance of travel ahead of neutral, clamped to max_stride / 2."""
+        vx, vy, yaw_rate = self.command
+        half_stance = self.spec.duty_factor * self.spec.cycle_time / 2
+        touchdown = self._rotate(self.neutral, math.radians(yaw_rate) * half_stance, self.touchdown)
+        touchdown -= self.neutral
+        touchdown += (vx * half_stance, vy * half_stance)
+
+        reach = np.hypot(touchdown[:, 0], touchdown[:, 1])
+        limit = self.max_stride / 2
+        if reach.max() > limit:
+            touchdown *= np.minimum(1.0, limit / np.maximum(reach, 1e-9))[:, None]
+
+    def plan(self, phase, dt, pos_x, pos_y, pos_z):
+        """
+        Move the footholds on by dt at cycle phase (0–1) and return the foot targets.
+        Returns an array (legs, 3) in LEG_IDS order. The array is reused between calls.
+        """
+        vx, vy, yaw_rate = self.command
+        leg_phase = self.leg_phases(phase)
+        swing = self.swing
+
+        # Stance: the ground moves past the body
+        points = self._points
+        np.add(self.neutral, self.feet, out=points)
+        self._rotate(points, -math.radians(yaw_rate) * dt, points)
+        points -= (vx * dt, vy * dt)
+        points -= self.neutral
+        stance_feet = points
+
+        # Swing: from lift-off to the touch-down point for the current command
+        lifting = swing & ~self.was_swing
+        self.liftoff[lifting] = self.feet[lifting]
+        self.was_swing[:] = swing
+        self._update_touchdown()
+        swing_phase = np.minimum(leg_phase / self.swing_fraction, 1.0)
+        forward, lift = self.spec.swing_profile(swing_phase)
+        swing_feet = self.liftoff + (self.touchdown - self.liftoff) * forward[:, None]
+
+        self.feet[:] = np.where(swing[:, None], swing_feet, stance_feet)
+
+        out = self.out
+        out[:, 0] = pos_x + self.cog_shift(leg_phase) + self.feet[:, 0]
+        out[:, 1] = pos_y + self.feet[:, 1]
+        out[:, 2] = pos_z + np.where(swing, self.lift_height * lift, 0.0)
+        return out
+
+    def update(self, pos_x, pos_y, pos_z):
+        """Advance the phase from the clock and return the foot targets."""
+        phase = self.advance()
+        return self.plan(phase, self.dt, pos_x, pos_y, pos_z)
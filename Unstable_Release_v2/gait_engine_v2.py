@@ -0,0 +1,115 @@
+from dataclasses import dataclass
+import numpy as np
+from batch_ik import LEG_IDS, DEFAULT_MASKS
+from clock import MonotonicClock
+from swing_profiles import MinimumJerkSwing, swing_offsets
+
+@dataclass(frozen=True)
+class GaitSpec:
+    """
+    One gait as data.
+    phase_offsets: per leg in LEG_IDS order, fraction of the cycle at which its swing starts
+    duty_factor:   fraction of the cycle each leg is on the ground
+    cycle_time:    seconds per full cycle
+    body_shift:    lateral shift (cm) away from the leg that most recently started
+                   its swing, to keep the centre of mass over the support legs; 0 for none
+    """
+    name: str
+    phase_offsets: tuple
+    duty_factor: float
+    cycle_time: float
+    swing_profile: object = MinimumJerkSwing()
+    body_shift: float = 0.0
+
+# Phase offsets are in LEG_IDS order: FL, FR, BL, BR
+GAITS = {
+    "crawl": GaitSpec("crawl", (2 / 8, 6 / 8, 0.0, 4 / 8), duty_factor=7 / 8, cycle_time=4.0, body_shift=2),
+    "trot": GaitSpec("trot", (0.0, 0.5, 0.5, 0.0), duty_factor=0.5, cycle_time=0.8),
+    "pace": GaitSpec("pace", (0.0, 0.5, 0.0, 0.5), duty_factor=0.5, cycle_time=0.8),
+    "bound": GaitSpec("bound", (0.0, 0.0, 0.5, 0.5), duty_factor=0.5, cycle_time=0.8),
+}
+
+class GaitEngine:
+    """
+    Evaluates a GaitSpec for all four legs in one vectorized call.
+
+    The cycle phase is advanced by elapsed time / cycle_time, so switching gaits
+    (or cycle times) keeps the phase continuous, and all per-tick arrays are
+    allocated once and reused.
+    """
+
+    def __init__(self, gait="crawl", clock=None, lift_height=5):
+        self.clock = clock or MonotonicClock()
+        self.lift_height = lift_height
+        self.side = DEFAULT_MASKS[0]
+        self.phase = 0.0
+        self.dt = 0.0
+        self.last_update = None
+
+        n = len(LEG_IDS)
+        self.phase_offsets = np.zeros(n)
+        self.leg_phase = np.zeros(n)
+        self.swing = np.zeros(n, dtype=bool)
+        self.out = np.zeros((n, 3))
+        self.set_gait(gait)
+
+    def set_gait(self, gait):
+        """Switch to a gait by name or GaitSpec, keeping the current phase."""
+        spec = GAITS[gait] if isinstance(gait, str) else gait
+        self.spec = spec
+        self.phase_offsets[:] = spec.phase_offsets
+        self.swing_fraction = 1.0 - spec.duty_factor
+
+    def restart(self, phase=0.0):
+        """Restart the cycle at `phase` (0–1); time starts counting from the next update."""
+        self.phase = phase % 1.0
+        self.last_update = None
+
+    def advance(self):
+        """Advance the cycle phase by the time since the last call (kept in self.dt)."""
+        now = self.clock.now()
+        self.dt = 0.0 if self.last_update is None else now - self.last_update
+        self.phase = (self.phase + self.dt / self.spec.cycle_time) % 1.0
+        self.last_update = now
+        return self.phase
+
+    def leg_phases(self, phase):
+        """
+        Per-leg phase (0–1, swing first) at a cycle phase; also updates the
+        self.swing mask. Returns self.leg_phase.
+        """
+        leg_phase = self.leg_phase
+        np.subtract(phase, self.phase_offsets, out=leg_phase)
+        leg_phase %= 1.0
+        np.less(leg_phase, self.swing_fraction, out=self.swing)
+        return leg_phase
+
+    def cog_shift(self, leg_phase):
+        """Lateral body shift away from the leg that most recently started its swing."""
+        if not self.spec.body_shift:
+            return 0.0
+        return -self.spec.body_shift * self.side[np.argmin(leg_phase)]
+
+    def targets_at(self, phase, step_length, pos_x, pos_y, pos_z):
+        """
+        Foot targets for all legs at a cycle phase (0–1).
+        Returns an array (legs, 3) in LEG_IDS order. The array is reused between calls.
+        """
+        leg_phase = self.leg_phases(phase)
+
+        # Swing: profile from end of stance to start of stance.
+        # Stance: slide back from +step/2 to -step/2.
+        swing_phase = np.minimum(leg_phase / self.swing_fraction, 1.0)
+        swing_y, swing_z = swing_offsets(self.spec.swing_profile, swing_phase, step_length, self.lift_height)
+        stance_phase = (leg_phase - self.swing_fraction) / self.spec.duty_factor
+        stance_y = step_length / 2 - step_length * stance_phase
+
+        out = self.out
+        out[:, 0] = pos_x + self.cog_shift(leg_phase)
+        np.add(pos_y, np.where(self.swing, swing_y, stance_y), out=out[:, 1])
+        np.add(pos_z, np.where(self.swing, swing_z, 0.0), out=out[:, 2])
+        return out
+
+    def update(self, step_length, pos_x, pos_y, pos_z):
+        """Advance the phase from the clock and return the foot targets."""
+        return self.targets_at(self.advance(), step_length, pos_x, pos_y, pos_z)
@@ -0,0 +1,68 @@
+import copy
+import numpy as np
+from batch_ik import LEG_IDS
+
+# Default compile resolution
+PHASE_BINS = 400                         # 10 ms per bin for the 4 s crawl cycle
+STEP_LENGTHS = np.linspace(-5, 5, 11)    # Step length buckets (cm), the controller's range
+
+class GaitTable:
+    """
+    Crawl gait baked into an array of foot offsets (step buckets, phase bins, legs, xyz)
+    relative to the body position, so target generation is a lookup plus an add.
+
+    Step buckets must be evenly spaced. Targets are linear in STEP_LENGTH, so
+    blending between buckets is exact; the only approximation is rounding the
+    phase to the nearest bin. Recompile after changing STEP_DURATION, LIFT_HEIGHT
+    or the phase offsets.
+    """
+
+    def __init__(self, gait_controller, step_lengths=STEP_LENGTHS, phase_bins=PHASE_BINS):
+        self.step_lengths = np.asarray(step_lengths, dtype=float)
+        self.phase_bins = phase_bins
+        self.offsets = np.empty((len(self.step_lengths), phase_bins, len(LEG_IDS), 3))
+
+        saved_step_length = gait_controller.STEP_LENGTH
+        try:
+            for k, step_length in enumerate(self.step_lengths):
+                gait_controller.STEP_LENGTH = step_length
+                for i in range(phase_bins):
+                    targets = gait_controller.crawl_targets_at(i / phase_bins, 0, 0, 0)
+                    self.offsets[k, i] = [targets[leg_id] for leg_id in LEG_IDS]
+        finally:
+            gait_controller.STEP_LENGTH = saved_step_length
+
+        self.deltas = np.diff(self.offsets, axis=0)
+
+        # Cycle blended for the last step length used; rebuilt only when it changes
+        self.cycle_step_length = None
+        self.cycle = np.empty(self.offsets.shape[1:])
+        self.out = np.empty((len(LEG_IDS), 3))
+
+    def fork(self):
+        """Copy sharing the compiled offsets, with its own lookup buffers (for another thread)."""
+        table = copy.copy(self)
+        table.cycle_step_length = None
+        table.cycle = np.empty_like(self.cycle)
+        table.out = np.empty_like(self.out)
+        return table
+
+    def _blend_cycle(self, step_length):
+        """Linear blend of the two nearest step length buckets into self.cycle."""
+        s = (step_length - self.step_lengths[0]) / (self.step_lengths[1] - self.step_lengths[0])
+        s = min(max(s, 0.0), len(self.step_lengths) - 1)
+        k = min(int(s), len(self.step_lengths) - 2)
+        np.multiply(self.deltas[k], s - k, out=self.cycle)
+        self.cycle += self.offsets[k]
+        self.cycle_step_length = step_length
+
+    def lookup(self, phase, step_length, pos_x, pos_y, pos_z):
+        """
+        Foot targets at a cycle phase (0–1) for a step length and body position.
+        Returns an array (legs, 3) in LEG_IDS order. The array is reused between calls.
+        """
+        if step_length != self.cycle_step_length:
+            self._blend_cycle(step_length)
+
+        i = int(phase * self.phase_bins + 0.5) % self.phase_bins
+        return np.add(self.cycle[i], (pos_x, pos_y, pos_z), out=self.out)
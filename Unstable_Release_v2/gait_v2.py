@@ -1,4 +1,5 @@
-import time
+from clock import MonotonicClock
+from swing_profiles import swing_offsets
 
 class GaitController:
     """Controls quadruped gait cycles and computes leg target positions."""
@@ -14,10 +15,13 @@ class GaitController:
     LEG_PHASE_OFFSETS = {'FL': 2, 'FR': 6, 'BR': 4, 'BL': 0}
     NUM_PHASES = 8           # Number of discrete phases in crawl gait
 
-    def __init__(self):
+    def __init__(self, clock=None, swing_profile=None):
+        self.clock = clock or MonotonicClock()
+        # Swing profile from swing_profiles; None uses square_step_phase
+        self.swing_profile = swing_profile
         self.STEP_LENGTH = 0
         self.phase = 0.0
-        self.start_time = time.time()
+        self.start_time = self.clock.now()
         self.just_started = True
         self.start_count = 0
 
@@ -59,16 +63,33 @@ class GaitController:
             y = base_y - self.STEP_LENGTH * progress
             return (base_x, y, base_z)
 
+    def crawl_phase(self):
+        """
+        Current position in the crawl cycle, 0–1, from the clock.
+        """
+        elapsed = self.clock.now() - self.start_time
+        total_cycle_time = self.STEP_DURATION * self.NUM_PHASES
+        return (elapsed % total_cycle_time) / total_cycle_time
+
+    def restart(self, phase=0.0):
+        """
+        Restart the crawl cycle so crawl_phase() reads `phase` (0–1) now.
+        """
+        total_cycle_time = self.STEP_DURATION * self.NUM_PHASES
+        self.start_time = self.clock.now() - phase * total_cycle_time
+
     def get_crawl_targets(self, pos_x, pos_y, pos_z, hip_x_offsets, current_positions):
         """
         Computes target positions for all legs in crawl gait.
         Returns: dict leg_id -> (x, y, z)
         """
-        now = time.time()
-        elapsed = now - self.start_time
-        total_cycle_time = self.STEP_DURATION * self.NUM_PHASES
-        current_phase = (elapsed % total_cycle_time) / total_cycle_time  # 0–1 over full gait
+        return self.crawl_targets_at(self.crawl_phase(), pos_x, pos_y, pos_z)
 
+    def crawl_targets_at(self, current_phase, pos_x, pos_y, pos_z):
+        """
+        Crawl gait targets at a given cycle phase (0–1 over the full gait).
+        Returns: dict leg_id -> (x, y, z)
+        """
         # Determine which leg is swinging
         swing_leg = None
         min_phase = 1.0
@@ -98,7 +119,12 @@ class GaitController:
 
             if is_swinging:
                 swing_phase = leg_phase * self.NUM_PHASES  # normalize to 0–1
-                target = self.square_step_phase(swing_phase, base_x, base_y, base_z)
+                if self.swing_profile is None:
+                    target = self.square_step_phase(swing_phase, base_x, base_y, base_z)
+                else:
+                    # Swing from the end of stance back to the start of stance
+                    dy, dz = swing_offsets(self.swing_profile, swing_phase, self.STEP_LENGTH, self.LIFT_HEIGHT)
+                    target = (base_x, base_y + float(dy), base_z + float(dz))
             else:
                 stance_phase = (leg_phase - 1 / self.NUM_PHASES) / (1 - 1 / self.NUM_PHASES)
                 y = base_y + self.STEP_LENGTH / 2 - self.STEP_LENGTH * stance_phase
@@ -156,4 +182,4 @@ class GaitController:
             if self.phase >= 0.5:
                 self.just_started = False
 
-        return
+        return target_positions
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+import numpy as np
+from batch_ik import DEFAULT_MODEL, leg_frame, solve_core, finish_angles, project_reachable
+
+MEMO_RESOLUTION = 0.01   # Leg-frame inputs are rounded to this (cm) before lookup
+MEMO_SIZE = 64           # Solutions kept per leg; the least recently used is dropped
+
+class IKMemo:
+    """
+    Memoizes the IK core per leg, keyed on the leg-frame point (u, y, w) rounded
+    to `resolution`.
+
+    The rounded point is projected into reach and solved, so every cached
+    solution is finite and the error is bounded by the resolution. Legs missing
+    on the same key in one tick share a single solve, so a level stance costs
+    one solve when it changes, and a robot holding a pose does no trig at all.
+    Misses are solved together in one call.
+
+    Targets must be (legs, 3) in the model's leg order.
+    """
+
+    def __init__(self, resolution=MEMO_RESOLUTION, size=MEMO_SIZE, model=DEFAULT_MODEL, solve_core=solve_core):
+        self.resolution = resolution
+        self.size = size
+        self.model = model
+        self.solve_core = solve_core
+        self.caches = [OrderedDict() for _ in model.leg_ids]
+
+        self.hits = 0
+        self.shared = 0   # Legs that reused another leg's solve in the same tick
+        self.misses = 0
+
+    def _store(self, leg, key, core):
+        cache = self.caches[leg]
+        cache[key] = core
+        if len(cache) > self.size:
+            cache.popitem(last=False)
+
+    def safe_solve(self, targets, masks=None, pitch=0, roll=0, pose=None):
+        """
+        Same interface as batch_ik.safe_batch_leg_ik: (angles, valid).
+        valid refers to the rounded point, so it can differ within `resolution` of the reach limits.
+        """
+        if pose is None:
+            pose = self.model.pose(pitch, roll, masks)
+        quantized = np.rint(np.stack(leg_frame(targets, pose), axis=-1) / self.resolution).astype(np.int64)
+        keys = quantized.tolist()
+
+        core = np.empty((len(keys), 3))
+        missing = {}   # key -> legs needing it, so equal points are solved once
+        for leg, key in enumerate(keys):
+            key = tuple(key)
+            keys[leg] = key
+            cache = self.caches[leg]
+            solution = cache.get(key)
+            if solution is None:
+                missing.setdefault(key, []).append(leg)
+                continue
+            cache.move_to_end(key)
+            self.hits += 1
+            core[leg] = solution
+
+        # Project the rounded points and solve every distinct miss in one call
+        points = quantized * self.resolution
+        u, y, w, valid = project_reachable(points[:, 0], points[:, 1], points[:, 2], pose.model)
+        if missing:
+            first = [legs[0] for legs in missing.values()]
+            solved = self.solve_core(u[first], y[first], w[first])
+            for (key, legs), solution in zip(missing.items(), solved):
+                for leg in legs:
+                    core[leg] = solution
+                    self._store(leg, key, solution)
+            self.misses += len(missing)
+            self.shared += sum(len(legs) - 1 for legs in missing.values())
+
+        return finish_angles(core, pose), valid
+
+    @property
+    def hit_rate(self):
+        """Fraction of leg solves avoided (cached or shared within a tick)."""
+        saved = self.hits + self.shared
+        total = saved + self.misses
+        return saved / total if total else 0.0
+
+    def summary(self):
+        return (f"{self.hits} hits, {self.shared} shared, "
+                f"{self.misses} misses ({self.hit_rate:.1%} hit rate)")
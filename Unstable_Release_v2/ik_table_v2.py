@@ -0,0 +1,164 @@
+import argparse
+import numpy as np
+from batch_ik import (DEFAULT_MODEL, HIP_X_SHIFT, HIP_OFFSET, THIGH_LENGTH, SHIN_LENGTH,
+                      leg_frame, solve_core, finish_angles, project_reachable)
+
+# Workspace the controller clamps foot targets to (cm)
+X_RANGE = (-10, 10)
+Y_RANGE = (-10, 10)
+Z_RANGE = (-22, -11)
+
+# Leg-frame box the table covers (cm): the workspace above, widened for the pitch/roll
+# height offsets and body-pose rotation the controller applies at its pose limits
+TABLE_U_RANGE = (-14, 14)
+TABLE_Y_RANGE = (-12, 14)
+TABLE_W_RANGE = (-24, -4)
+
+# The solution is singular at full leg extension and where the knee plane meets
+# the hip axis, so the table only serves points at least EXTENSION_MARGIN (cm)
+# inside the leg's reach and SPAN_MARGIN (cm) from the axis; the rest (and
+# anything outside the box) is solved analytically
+EXTENSION_MARGIN = 0.5
+SPAN_MARGIN = 4.0
+
+# File layout: magic, then float64 header values, then float32 table (nx, ny, nz, 3)
+TABLE_MAGIC = b"SPIKLUT1"
+HEADER_VALUES = 11   # x0, x1, nx, y0, y1, ny, z0, z1, nz, max_error, box_error
+HEADER_SIZE = 128
+
+
+def _interpolate(table, lows, steps, u, y, w):
+    """
+    Trilinear interpolation of a (nx, ny, nz, 3) table at leg-frame points.
+    Points outside the table are clamped to its edges.
+    """
+    u, y, w = np.broadcast_arrays(u, y, w)
+    index = []
+    frac = []
+    for value, low, step, n in zip((u, y, w), lows, steps, table.shape[:3]):
+        f = np.clip((value - low) / step, 0, n - 1)
+        i = np.minimum(f.astype(int), n - 2)
+        index.append(i)
+        frac.append((f - i)[..., None])
+
+    (i, j, k), (fx, fy, fz) = index, frac
+    result = np.zeros(u.shape + (3,))
+    for di, wx in ((0, 1 - fx), (1, fx)):
+        for dj, wy in ((0, 1 - fy), (1, fy)):
+            for dk, wz in ((0, 1 - fz), (1, fz)):
+                result += wx * wy * wz * table[i + di, j + dj, k + dk]
+    return result
+
+
+def _served(u, y, w, lows, highs):
+    """True where the table is used for leg-frame points (see EXTENSION_MARGIN)."""
+    d_squared = (u + HIP_X_SHIFT) ** 2 + w ** 2 - HIP_OFFSET ** 2
+    served = d_squared >= SPAN_MARGIN ** 2
+    served &= d_squared + y ** 2 <= (THIGH_LENGTH + SHIN_LENGTH - EXTENSION_MARGIN) ** 2
+    for value, low, high in zip((u, y, w), lows, highs):
+        served &= (value >= low) & (value <= high)
+    return served
+
+
+def build_ik_table(path, resolution=0.25, x_range=TABLE_U_RANGE, y_range=TABLE_Y_RANGE, z_range=TABLE_W_RANGE):
+    """
+    Samples the analytic IK core over a leg-frame box and writes it to path.
+    resolution: grid spacing in cm.
+    Returns (max_error, box_error): the worst-case error in degrees against
+    the analytic solution, measured at every cell centre, for the points the
+    table serves (see EXTENSION_MARGIN) and for the whole box. Both are stored
+    in the header.
+    """
+    axes = []
+    for low, high in (x_range, y_range, z_range):
+        n = int(round((high - low) / resolution)) + 1
+        axes.append(np.linspace(low, high, n))
+
+    grid = np.meshgrid(*axes, indexing='ij')
+    table = solve_core(*grid).astype('<f4')
+
+    # Cell centres are the furthest points from the samples
+    centres = np.meshgrid(*[(a[:-1] + a[1:]) / 2 for a in axes], indexing='ij')
+    lows = [a[0] for a in axes]
+    steps = [a[1] - a[0] for a in axes]
+    approx = _interpolate(table, lows, steps, *centres)
+    error = np.abs(approx - solve_core(*centres)).max(axis=-1)
+
+    served = _served(*centres, lows, [a[-1] for a in axes])
+    max_error = float(np.nanmax(error[served]))
+    box_error = float(np.nanmax(error))
+
+    header = np.zeros(HEADER_VALUES, dtype='<f8')
+    for n, (a, (low, high)) in enumerate(zip(axes, (x_range, y_range, z_range))):
+        header[3 * n:3 * n + 3] = (low, high, len(a))
+    header[9:11] = (max_error, box_error)
+
+    with open(path, "wb") as f:
+        f.write(TABLE_MAGIC)
+        f.write(header.tobytes())
+        f.write(b"\0" * (HEADER_SIZE - len(TABLE_MAGIC) - header.nbytes))
+        f.write(table.tobytes())
+
+    return max_error, box_error
+
+
+class IKTable:
+    """
+    Constant-time IK backed by a memory-mapped table from build_ik_table().
+    At the default 0.25 cm resolution the worst-case error is under 1 degree
+    (stored as max_error). Leg-frame points the table does not serve (outside
+    the box, or near a singularity, see EXTENSION_MARGIN) are solved
+    analytically instead, and counted in `fallbacks`.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(TABLE_MAGIC)) != TABLE_MAGIC:
+                raise ValueError(f"{path} is not an IK table file")
+            header = np.frombuffer(f.read(HEADER_VALUES * 8), dtype='<f8')
+
+        shape = tuple(int(n) for n in header[2:9:3]) + (3,)
+        self.lows = header[0:9:3]
+        self.highs = header[1:9:3]
+        self.steps = (self.highs - self.lows) / (np.array(shape[:3]) - 1)
+        self.max_error = float(header[9])
+        self.box_error = float(header[10])
+        self.table = np.memmap(path, dtype='<f4', mode='r', offset=HEADER_SIZE, shape=shape)
+        self.fallbacks = 0
+
+    def solve_core(self, u, y, w):
+        """Drop-in replacement for batch_ik.solve_core using the table."""
+        u, y, w = np.broadcast_arrays(u, y, w)
+        core = _interpolate(self.table, self.lows, self.steps, u, y, w)
+
+        # The table would clamp these to its edge or interpolate across a singularity
+        outside = ~_served(u, y, w, self.lows, self.highs)
+        if outside.any():
+            core[outside] = solve_core(u[outside], y[outside], w[outside])
+            self.fallbacks += int(np.count_nonzero(outside))
+        return core
+
+    def solve(self, targets, masks=None, pitch=0, roll=0, pose=None):
+        """Same interface and result layout as batch_leg_ik."""
+        if pose is None:
+            pose = DEFAULT_MODEL.pose(pitch, roll, masks)
+        core = self.solve_core(*leg_frame(targets, pose))
+        return finish_angles(core, pose)
+
+    def safe_solve(self, targets, masks=None, pitch=0, roll=0, pose=None):
+        """Same interface and result as batch_ik.safe_batch_leg_ik: (angles, valid)."""
+        if pose is None:
+            pose = DEFAULT_MODEL.pose(pitch, roll, masks)
+        u, y, w, valid = project_reachable(*leg_frame(targets, pose), pose.model)
+        return finish_angles(self.solve_core(u, y, w), pose), valid
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the precomputed IK lookup table.")
+    parser.add_argument("--out", default="ik_table.bin", help="output file")
+    parser.add_argument("--resolution", type=float, default=0.25, help="grid spacing in cm")
+    args = parser.parse_args()
+
+    max_error, box_error = build_ik_table(args.out, args.resolution)
+    print(f"Wrote {args.out}")
+    print(f"Worst-case error: {max_error:.4f} degrees where used, {box_error:.4f} degrees whole box")
@@ -1,10 +1,14 @@
-import time
+import math
+import numpy as np
+from batch_ik import LEG_IDS
+from clock import MonotonicClock
 
 class Interpolator:
     """Smoothly interpolates leg positions toward target positions."""
 
-    def __init__(self, step_time=0.03, speed=0.1):
-        self.last_update = time.time()
+    def __init__(self, step_time=0.03, speed=0.1, clock=None):
+        self.clock = clock or MonotonicClock()
+        self.last_update = self.clock.now()
         self.current_positions = {}  # leg_id -> (x, y, z)
         self.speed = speed
         self.step_time = step_time
@@ -15,7 +19,7 @@ class Interpolator:
         Only updates if enough time (self.step_time) has passed.
         Returns updated positions dict.
         """
-        now = time.time()
+        now = self.clock.now()
         if now - self.last_update < self.step_time:
             return self.current_positions
 
@@ -29,4 +33,76 @@ class Interpolator:
 
         self.current_positions = new_positions
         self.last_update = now
-        return
+        return new_positions
+
+
+class SmoothInterpolator:
+    """
+    Rate-independent smoothing of all leg positions at once.
+
+    State is one (legs, 3) array, updated with the real elapsed time dt, so the
+    motion is the same whether the loop runs at 50 Hz or 500 Hz. Modes:
+      "exponential": first-order lag with time constant `time_constant`
+      "critical":    critically damped second-order filter (no overshoot,
+                     continuous velocity) with natural period 2*pi*time_constant
+    Both are the exact solution for a target held constant over dt.
+    The default matches Interpolator(speed=0.7) at 50 Hz.
+    """
+
+    MODES = ("exponential", "critical")
+
+    def __init__(self, time_constant=0.0166, mode="exponential", num_legs=4, clock=None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown mode '{mode}', expected one of {self.MODES}")
+        self.time_constant = time_constant
+        self.mode = mode
+        self.clock = clock or MonotonicClock()
+        self.last_update = None
+        self.positions = np.zeros((num_legs, 3))
+        self.velocities = np.zeros((num_legs, 3))
+        self._error = np.zeros((num_legs, 3))
+
+    @property
+    def current_positions(self):
+        """Positions as dict leg_id -> (x, y, z), for code using Interpolator's API."""
+        return {leg_id: tuple(p) for leg_id, p in zip(LEG_IDS, self.positions)}
+
+    def reset(self, positions):
+        """Jump straight to positions with zero velocity."""
+        self.positions[:] = positions
+        self.velocities[:] = 0
+        self.last_update = self.clock.now()
+
+    def update(self, targets, dt=None):
+        """
+        Move all legs toward targets (array (legs, 3)) over dt seconds,
+        measured from the clock if not given. The first call jumps to targets.
+        Returns the positions array (updated in place).
+        """
+        now = self.clock.now()
+        if self.last_update is None:
+            self.reset(targets)
+            return self.positions
+        if dt is None:
+            dt = now - self.last_update
+        self.last_update = now
+        if dt <= 0:
+            return self.positions
+
+        error = self._error
+        np.subtract(self.positions, targets, out=error)
+
+        if self.mode == "exponential":
+            error *= math.exp(-dt / self.time_constant)
+        else:
+            # e(t) = (e0 + (v0 + w e0) t) exp(-w t), v(t) = (v0 - w (v0 + w e0) t) exp(-w t)
+            w = 1.0 / self.time_constant
+            decay = math.exp(-w * dt)
+            impulse = self.velocities + w * error
+            error += impulse * dt
+            error *= decay
+            self.velocities -= w * dt * impulse
+            self.velocities *= decay
+
+        np.add(targets, error, out=self.positions)
+        return self.positions
@@ -0,0 +1,132 @@
+import threading
+from collections import deque
+from clock import MonotonicClock
+
+class JoystickSnapshot:
+    """
+    Immutable joystick state at one moment. Has the get_axis/get_button
+    methods of pygame's Joystick, so mode handlers can take either.
+    stamp: clock time the newest event in it arrived.
+    """
+
+    __slots__ = ("axes", "buttons", "stamp")
+
+    def __init__(self, axes, buttons, stamp):
+        self.axes = axes
+        self.buttons = buttons
+        self.stamp = stamp
+
+    def get_axis(self, axis):
+        return self.axes[axis]
+
+    def get_button(self, button):
+        return self.buttons[button]
+
+class JoystickInput:
+    """
+    Reads pygame joystick events on a background thread so the control loop
+    never pumps events or polls the device.
+
+    Axis and button events replace `snapshot` with a new JoystickSnapshot
+    (a single attribute assignment, so readers always see a consistent state).
+    Button presses and releases are also queued as (button, pressed, stamp),
+    so an edge between two control ticks is never missed. Only this thread
+    may touch the pygame event queue once it is running.
+    """
+
+    def __init__(self, joystick, clock=None, wait_timeout_ms=100):
+        # pygame is only needed on the robot
+        import pygame
+        self.event = pygame.event
+        self.axis_motion = pygame.JOYAXISMOTION
+        self.button_down = pygame.JOYBUTTONDOWN
+        self.button_up = pygame.JOYBUTTONUP
+        self.no_event = pygame.NOEVENT
+
+        self.clock = clock or MonotonicClock()
+        self.wait_timeout_ms = wait_timeout_ms
+        self.snapshot = JoystickSnapshot(
+            tuple(joystick.get_axis(i) for i in range(joystick.get_numaxes())),
+            tuple(bool(joystick.get_button(i)) for i in range(joystick.get_numbuttons())),
+            self.clock.now(),
+        )
+        # deque append/popleft are atomic, so the edge queue needs no lock
+        self.edges = deque()
+        self.events = 0
+
+        self.running = True
+        self.thread = threading.Thread(target=self._read_loop)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _read_loop(self):
+        while self.running:
+            event = self.event.wait(self.wait_timeout_ms)
+            if event.type == self.no_event:
+                continue
+            now = self.clock.now()
+            snapshot = self.snapshot
+
+            if event.type == self.axis_motion and event.axis < len(snapshot.axes):
+                axes = list(snapshot.axes)
+                axes[event.axis] = event.value
+                self.snapshot = JoystickSnapshot(tuple(axes), snapshot.buttons, now)
+            elif event.type in (self.button_down, self.button_up) and event.button < len(snapshot.buttons):
+                pressed = event.type == self.button_down
+                buttons = list(snapshot.buttons)
+                buttons[event.button] = pressed
+                self.snapshot = JoystickSnapshot(snapshot.axes, tuple(buttons), now)
+                self.edges.append((event.button, pressed, now))
+            else:
+                continue
+            self.events += 1
+
+    def latest(self):
+        """The most recent JoystickSnapshot."""
+        return self.snapshot
+
+    def pop_edges(self):
+        """Button edges since the last call, oldest first, as (button, pressed, stamp)."""
+        if not self.edges:
+            return ()
+        edges = []
+        while self.edges:
+            edges.append(self.edges.popleft())
+        return edges
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+
+class ScriptedInput:
+    """
+    Joystick source with JoystickInput's interface, driven from code instead of
+    a device, for running the controller loop in benchmarks and checks.
+    set_axis() replaces the snapshot; press() queues a press and a release.
+    """
+
+    def __init__(self, num_axes=6, num_buttons=13, clock=None):
+        self.clock = clock or MonotonicClock()
+        self.snapshot = JoystickSnapshot((0.0,) * num_axes, (False,) * num_buttons, self.clock.now())
+        self.edges = deque()
+
+    def set_axis(self, axis, value):
+        axes = list(self.snapshot.axes)
+        axes[axis] = value
+        self.snapshot = JoystickSnapshot(tuple(axes), self.snapshot.buttons, self.clock.now())
+
+    def press(self, button):
+        now = self.clock.now()
+        self.edges.append((button, True, now))
+        self.edges.append((button, False, now))
+
+    def latest(self):
+        return self.snapshot
+
+    def pop_edges(self):
+        edges = list(self.edges)
+        self.edges.clear()
+        return edges
+
+    def stop(self):
+        pass
@@ -0,0 +1,76 @@
+import threading
+import time
+
+class LightbarManager:
+    """
+    Wraps a DualSenseController lightbar so the control loop can set the color
+    every tick for free. Repeated colors are dropped on the caller's thread and
+    only changes are sent, from a background thread, at most once per min_interval.
+    A failed send is retried (still rate limited) until it succeeds or the
+    request changes.
+    """
+
+    def __init__(self, controller, min_interval=0.1):
+        self.controller = controller
+        self.min_interval = min_interval
+        self.requested = None   # Latest color asked for (tuple assignment is atomic)
+        self.sent = None        # Last color actually sent
+        self.sends = 0
+        self.deduped = 0
+        self.running = True
+        self._changed = threading.Event()
+        self.thread = threading.Thread(target=self._send_loop)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def set_color(self, r, g, b):
+        """
+        Request a lightbar color. Never blocks; identical requests are ignored.
+        """
+        color = (r, g, b)
+        if color == self.requested:
+            self.deduped += 1
+            return
+        self.requested = color
+        self._changed.set()
+
+    def _send(self, color):
+        """Send a color now. Returns False if it failed."""
+        try:
+            self.controller.lightbar.set_color(*color)
+        except OSError as e:
+            print(f"[LED Error] Failed to set lightbar to {color}: {e}")
+            return False
+        self.sent = color
+        self.sends += 1
+        return True
+
+    def _send_loop(self):
+        last_send = None
+        while self.running:
+            self._changed.wait()
+            self._changed.clear()
+
+            # Rate limit: later requests in the wait window collapse into one send
+            if last_send is not None:
+                wait = last_send + self.min_interval - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+
+            color = self.requested
+            if color is None or color == self.sent or not self.running:
+                continue
+            if not self._send(color):
+                # Retry on the next rate-limited pass; set_color() would drop the repeat
+                self._changed.set()
+            last_send = time.monotonic()
+
+    def stop(self, final_color=None):
+        """
+        Stop the worker, then optionally send a last color directly (e.g. off).
+        """
+        self.running = False
+        self._changed.set()
+        self.thread.join()
+        if final_color is not None:
+            self._send(final_color)
@@ -1,66 +1,44 @@
 import math
+from batch_ik import DEFAULT_MODEL, LEG_IDS
 
 def leg_ik(x, y, z, leg_id, pitch=0, roll=0):
     """
     Computes the inverse kinematics for a single leg.
     Returns a dict with 'hip', 'thigh', and 'shin' angles in degrees.
+    Builds a pose for pitch/roll each call; loops over legs should build one
+    with DEFAULT_MODEL.pose() and call solve_leg directly.
     """
-    # Mirror x for left legs
-    if "L" in leg_id.upper():
-        x = -x
+    return solve_leg(x, y, z, LEG_IDS.index(leg_id.upper()), DEFAULT_MODEL.pose(pitch, roll))
 
-    # Hip offset adjustment (do not remove)
-    x += 6.25
-
-    # Body dimensions
-    body_length = 29.5
-    body_width = 8
-
-    # Convert pitch and roll to radians
-    pitch_rad = math.radians(pitch)
-    roll_rad = math.radians(roll)
-
-    # Pitch height offset
-    pitch_multiplier = 0.5 if leg_id.upper() in ['FL', 'FR'] else -0.5
-    pitch_height_offset = pitch_multiplier * body_length * math.tan(pitch_rad)
-
-    # Roll height offset
-    roll_multiplier = 0.5 if "L" in leg_id.upper() else -0.5
-    roll_height_offset = roll_multiplier * body_width * math.tan(roll_rad)
-
-    # Apply pitch and roll offsets to z
-    z += pitch_height_offset + roll_height_offset
+def solve_leg(x, y, z, leg, pose):
+    """
+    Single-leg IK for leg index `leg` in pose.model.leg_ids, using a PoseContext
+    from batch_ik.RobotModel.pose(). Returns the same dict as leg_ik. The link lengths, leg signs and
+    pitch/roll trig come from the model and pose, so nothing is recomputed per leg.
+    """
+    model = pose.model
+    side = model.sides[leg]
 
-    # Invert z so negative is down
-    z = -z
+    # Mirror x for left legs, hip offset adjustment, pitch/roll height offset
+    x = -side * x + model.hip_x_shift
+    z = -(z + pose.offsets[leg])
 
     # Hip calculations
-    hip_offset = 6.2
-    d = math.sqrt((x ** 2 + z ** 2) - hip_offset ** 2)
-    hip_rad = math.atan(x / z) + math.atan(d / hip_offset)
-    hip_deg = math.degrees(hip_rad)
+    d = math.sqrt((x ** 2 + z ** 2) - model.hip_offset ** 2)
+    hip_deg = math.degrees(math.atan(x / z) + math.atan(d / model.hip_offset))
 
     # Thigh and shin calculations
     g = math.sqrt(d ** 2 + y ** 2)
-    shin_unclamped = (10.5 ** 2 + 13 ** 2 - g ** 2) / (2 * 10.5 * 13)
-    shin_clamped = max(-1, min(1, shin_unclamped))
-    shin = math.acos(shin_clamped)
-    thigh = math.atan(-y / d) + math.asin((13 * math.sin(shin)) / g)
+    shin_cos = (model.link_squares - g ** 2) / model.link_product
+    shin = math.acos(max(-1, min(1, shin_cos)))
+    thigh = math.atan(-y / d) + math.asin(max(-1, min(1, (model.shin_length * math.sin(shin)) / g)))
 
     shin_deg = 180 - (math.degrees(shin) - 45)
-    thigh_deg = 90 - math.degrees(thigh)
-
-    # Pitch compensation for thigh
-    thigh_deg += pitch
-
-    # Roll compensation for hip
-    if "L" in leg_id.upper():
-        hip_deg += roll
-    else:
-        hip_deg -= roll
+    thigh_deg = 90 - math.degrees(thigh) + pose.pitch
+    hip_deg += side * pose.roll
 
     # Mirror angles for right legs
-    if "R" in leg_id.upper():
+    if side < 0:
         thigh_deg = 180 - thigh_deg
         shin_deg = 180 - shin_deg
         hip_deg = 180 - hip_deg
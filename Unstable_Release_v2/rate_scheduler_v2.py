@@ -0,0 +1,91 @@
+import time
+
+class RateScheduler:
+    """
+    Runs a loop at a fixed rate using monotonic deadlines instead of a fixed sleep,
+    so compute and I/O time do not stretch the period.
+
+    Overrun policies:
+      "skip":     drop the missed deadlines and realign to the next one in the future
+      "catch_up": run late ticks back to back until on schedule again
+                  (at most MAX_CATCH_UP periods behind, then realign)
+    """
+
+    POLICIES = ("skip", "catch_up")
+    MAX_CATCH_UP = 5
+
+    def __init__(self, rate_hz=50, policy="skip", clock=time.monotonic, sleep=time.sleep):
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be positive")
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown policy '{policy}', expected one of {self.POLICIES}")
+        self.rate_hz = rate_hz
+        self.period = 1.0 / rate_hz
+        self.policy = policy
+        self.clock = clock
+        self.sleep = sleep
+        self.next_deadline = None
+
+        # Stats
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.slack = 0.0       # Slack of the last tick in seconds (negative when late)
+        self.min_slack = None
+        self.wakeups = 0
+        self.jitter_total = 0.0   # Sum and max of how late each sleep woke up (s)
+        self.max_jitter = 0.0
+
+    def start(self):
+        """Set the first deadline one period from now."""
+        self.next_deadline = self.clock() + self.period
+
+    def wait(self):
+        """
+        Sleep until the end of the current tick.
+        Returns the tick's slack in seconds (time left before the deadline).
+        """
+        if self.next_deadline is None:
+            self.start()
+
+        slack = self.next_deadline - self.clock()
+        if slack >= 0:
+            self.sleep(slack)
+            jitter = self.clock() - self.next_deadline
+            self.wakeups += 1
+            self.jitter_total += jitter
+            if jitter > self.max_jitter:
+                self.max_jitter = jitter
+            self.next_deadline += self.period
+        else:
+            self.overruns += 1
+            missed = int(-slack / self.period)
+            if self.policy == "skip" or missed >= self.MAX_CATCH_UP:
+                self.skipped += missed
+                self.next_deadline += (missed + 1) * self.period
+            else:
+                self.next_deadline += self.period
+
+        self.ticks += 1
+        self.slack = slack
+        if self.min_slack is None or slack < self.min_slack:
+            self.min_slack = slack
+        return slack
+
+    def remaining(self):
+        """Time left (s) before the current tick's deadline."""
+        if self.next_deadline is None:
+            return self.period
+        return self.next_deadline - self.clock()
+
+    def jitter(self):
+        """(mean, max) wake-up lateness in seconds over the ticks that slept."""
+        mean = self.jitter_total / self.wakeups if self.wakeups else 0.0
+        return mean, self.max_jitter
+
+    def summary(self):
+        min_slack_ms = (self.min_slack or 0.0) * 1000
+        mean_jitter, max_jitter = self.jitter()
+        return (f"{self.ticks} ticks at {self.rate_hz} Hz, {self.overruns} overruns, "
+                f"{self.skipped} skipped, min slack {min_slack_ms:.2f} ms, "
+                f"wake jitter mean {mean_jitter * 1000:.3f} ms, max {max_jitter * 1000:.3f} ms")
@@ -0,0 +1,125 @@
+import ctypes
+import ctypes.util
+import gc
+import os
+from rate_scheduler import RateScheduler
+
+# Opt-in real-time setup for the control thread. Every step is best effort:
+# what is not permitted (no root, no CAP_SYS_NICE, not Linux) is reported and skipped.
+
+MCL_CURRENT = 1   # mlockall flags from <sys/mman.h>
+MCL_FUTURE = 2
+
+GC_MIN_SLACK_FRACTION = 0.25   # Only collect garbage with at least this fraction of the period left
+GC_MAX_SKIPS = 50              # ...but collect anyway once this many due collections were put off
+
+def lock_memory():
+    """
+    mlockall(MCL_CURRENT | MCL_FUTURE) through libc so the loop never page-faults.
+    Returns None on success, or the reason it failed.
+    """
+    path = ctypes.util.find_library("c")
+    if path is None:
+        return "libc not found"
+    libc = ctypes.CDLL(path, use_errno=True)
+    if not hasattr(libc, "mlockall"):
+        return "mlockall not available"
+    if libc.mlockall(MCL_CURRENT | MCL_FUTURE) != 0:
+        return os.strerror(ctypes.get_errno())
+    return None
+
+def enable_realtime(cpu=None, priority=50, nice=-10, lock=True):
+    """
+    Prepare the calling (control) thread for real-time running:
+      - collect, gc.freeze() the startup objects and disable automatic GC
+        (run a SlackCollector from the loop instead)
+      - pin the thread to `cpu`
+      - SCHED_FIFO at `priority`, falling back to `nice` if not permitted
+      - lock memory
+    Threads started before this keep their own affinity and policy.
+    Returns a list of report lines, one per step.
+    """
+    report = []
+
+    gc.collect()
+    gc.freeze()
+    gc.disable()
+    report.append(f"gc: froze {gc.get_freeze_count()} objects, automatic collection off")
+
+    if cpu is not None:
+        try:
+            os.sched_setaffinity(0, {cpu})
+            report.append(f"affinity: pinned to CPU {cpu}")
+        except (AttributeError, OSError) as e:
+            report.append(f"affinity: not set ({e})")
+
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+        report.append(f"scheduler: SCHED_FIFO priority {priority}")
+    except (AttributeError, OSError) as e:
+        try:
+            os.setpriority(os.PRIO_PROCESS, 0, nice)
+            report.append(f"scheduler: SCHED_FIFO not set ({e}), nice {nice}")
+        except (AttributeError, OSError) as e2:
+            report.append(f"scheduler: SCHED_FIFO not set ({e}), nice not set ({e2})")
+
+    if lock:
+        error = lock_memory()
+        report.append("memory: locked" if error is None else f"memory: not locked ({error})")
+
+    return report
+
+def due_generation():
+    """The oldest generation automatic GC would collect now, or None."""
+    counts = gc.get_count()
+    thresholds = gc.get_threshold()
+    generation = None
+    for g in range(len(counts)):
+        if thresholds[g] and counts[g] >= thresholds[g]:
+            generation = g
+    return generation
+
+class SlackCollector:
+    """
+    With automatic GC off, runs the collection automatic GC would have run, at
+    the end of a tick that has at least min_fraction of the period left. The
+    threshold scales with the loop rate, and after max_skips due collections
+    were put off for lack of slack one is forced, so garbage stays bounded
+    even when the loop never has that much slack.
+    """
+
+    def __init__(self, period, min_fraction=GC_MIN_SLACK_FRACTION, max_skips=GC_MAX_SKIPS):
+        self.min_slack = period * min_fraction
+        self.max_skips = max_skips
+        self.skipped = 0
+        self.collections = 0
+        self.forced = 0
+
+    def collect(self, slack):
+        """Collect if due and there is time (or too many were skipped). Returns the generation, or None."""
+        generation = due_generation()
+        if generation is None:
+            return None
+        if slack < self.min_slack:
+            if self.skipped < self.max_skips:
+                self.skipped += 1
+                return None
+            self.forced += 1
+        self.skipped = 0
+        gc.collect(generation)
+        self.collections += 1
+        return generation
+
+    def summary(self):
+        return f"{self.collections} collections ({self.forced} forced), min slack {self.min_slack * 1000:.2f} ms"
+
+def measure_jitter(rate_hz=50, ticks=100):
+    """
+    Run an empty loop for `ticks` ticks and return (mean, max) wake-up
+    lateness in seconds, as a baseline for the scheduler's jitter stats.
+    """
+    scheduler = RateScheduler(rate_hz)
+    scheduler.start()
+    for _ in range(ticks):
+        scheduler.wait()
+    return scheduler.jitter()
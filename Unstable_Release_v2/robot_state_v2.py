@@ -0,0 +1,57 @@
+import numpy as np
+import send_servo
+from batch_ik import LEG_IDS, JOINTS
+
+class RobotState:
+    """
+    Per-tick robot state in preallocated arrays, updated in place by each stage
+    instead of building dicts and tuples every tick.
+
+      targets: (legs, 3) foot targets (cm), LEG_IDS order
+      joints:  (legs, 3) joint angles (degrees), JOINTS order
+      duty:    (legs * 3,) 16-bit duty cycle per servo, in `channels` order
+      counts:  (legs * 3,) 12-bit PCA9685 OFF count per servo
+
+    update_outputs() is the vectorized equivalent of send_servo.channel_pwm and
+    duty_to_counts for all twelve servos, with calibration offsets refreshed
+    when send_servo.offsets_version changes.
+    """
+
+    __slots__ = ("targets", "joints", "channels", "duty", "counts", "_offsets", "_offsets_version", "_scratch")
+
+    def __init__(self, channel_map, leg_ids=LEG_IDS):
+        n = len(leg_ids)
+        self.targets = np.zeros((n, 3))
+        self.joints = np.zeros((n, 3))
+        self.channels = tuple(channel_map[leg_id][joint] for leg_id in leg_ids for joint in JOINTS)
+        self.duty = np.zeros(n * 3, dtype=np.int64)
+        self.counts = np.zeros(n * 3, dtype=np.int64)
+        self._offsets = np.zeros(n * 3)
+        self._offsets_version = None
+        self._scratch = np.zeros(n * 3)
+
+    def _refresh_offsets(self):
+        self._offsets[:] = [send_servo.offsets.get(str(channel), 0) for channel in self.channels]
+        self._offsets_version = send_servo.offsets_version
+
+    def update_outputs(self):
+        """Recompute duty and counts in place from joints."""
+        if self._offsets_version != send_servo.offsets_version:
+            self._refresh_offsets()
+
+        # Same operations, in the same order, as channel_pwm and angle_to_pwm
+        angle = self._scratch
+        np.add(self.joints.reshape(-1), self._offsets, out=angle)
+        np.clip(angle, 0, 180, out=angle)
+        angle /= 180.0
+        angle *= 2500 - 500
+        angle += 500
+        angle *= 65535
+        angle /= 3030
+        np.trunc(angle, out=angle)
+        self.duty[:] = angle
+
+        # duty_to_counts
+        np.add(self.duty, 1, out=self.counts)
+        np.right_shift(self.counts, 4, out=self.counts)
+        return self.counts
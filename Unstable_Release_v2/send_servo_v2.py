@@ -1,16 +1,56 @@
 import json
-from board import SCL, SDA
-import busio
-from adafruit_pca9685 import PCA9685
+import os
+import struct
+from servo_backend import make_backend, LED0_ON_L
+
+OFFSETS_FILE = "offsets2.json"
 
 # Load servo offsets from file
-with open("offsets2.json", "r") as f:
+with open(OFFSETS_FILE, "r") as f:
     offsets = json.load(f)
 
-# Set up I2C and PCA9685 controller
-i2c = busio.I2C(SCL, SDA)
-pca = PCA9685(i2c)
-pca.frequency = 330
+# Bumped whenever offsets change, so anything baked from them can tell it is stale
+offsets_version = 0
+
+def reload_offsets(path=OFFSETS_FILE):
+    """
+    Reload servo offsets (calibration) from file.
+    """
+    global offsets, offsets_version
+    with open(path, "r") as f:
+        offsets = json.load(f)
+    offsets_version += 1
+
+# Servo backend: "pca9685" (real hardware), "mock", "latency-100k" or "latency-400k".
+# Opened on first use so importing this module never touches the bus.
+SERVO_BACKEND = os.environ.get("SERVO_BACKEND", "pca9685")
+PWM_FREQUENCY = 330
+backend = None
+
+def get_backend():
+    """
+    Return the active servo backend, creating it on first use.
+    """
+    global backend
+    if backend is None:
+        backend = make_backend(SERVO_BACKEND, PWM_FREQUENCY)
+    return backend
+
+def set_backend(new_backend):
+    """
+    Replace the servo backend (e.g. with a mock) and forget committed values.
+    """
+    global backend
+    backend = new_backend
+    last_counts.clear()
+
+# Skip channel writes that change the OFF count by less than this many PWM counts
+# (1 skips only unchanged values)
+WRITE_THRESHOLD = 1
+
+# Last OFF count committed per channel, and write counters
+last_counts = {}
+write_stats = {"issued": 0, "skipped": 0}
 
 def angle_to_pwm(angle):
     """
@@ -22,16 +62,90 @@ def angle_to_pwm(angle):
     duty_cycle = int(pulse_width * 65535 / 3030)  # 20ms period
     return duty_cycle
 
-def set_servo(channel, angle):
+def duty_to_counts(duty_cycle):
     """
-    Set the servo on the specified channel to the given angle, applying any offset.
+    Convert a 16-bit duty cycle to the 12-bit OFF count the PCA9685 uses
+    (same conversion as the Adafruit driver).
+    """
+    return (duty_cycle + 1) >> 4
+
+def channel_pwm(channel, angle):
+    """
+    Duty cycle for the servo on the given channel, applying its offset.
     """
     offset = offsets.get(str(channel), 0)
     corrected_angle = max(0, min(180, angle + offset))
-    pwm = angle_to_pwm(corrected_angle)
-    pca.channels[channel].duty_cycle = pwm
+    return angle_to_pwm(corrected_angle)
+
+def is_dirty(channel, counts):
+    """
+    True if counts differs enough from the last committed value to be written.
+    Counts skipped writes in write_stats.
+    """
+    last = last_counts.get(channel)
+    if last is not None and abs(counts - last) < WRITE_THRESHOLD:
+        write_stats["skipped"] += 1
+        return False
+    return True
+
+def reset_write_stats():
+    write_stats["issued"] = 0
+    write_stats["skipped"] = 0
+
+def set_servo(channel, angle):
+    """
+    Set the servo on the specified channel to the given angle, applying any offset.
+    Unchanged values are not written (see WRITE_THRESHOLD).
+    """
+    write_counts({channel: duty_to_counts(channel_pwm(channel, angle))})
     # Uncomment for debugging:
-    # print(f"Channel {channel}: base={angle:.1f}, offset={offset}, final={corrected_angle:.1f}")
+    # print(f"Channel {channel}: base={angle:.1f}, offset={offsets.get(str(channel), 0)}")
+
+def contiguous_runs(channels):
+    """
+    Split channels into runs of consecutive channel numbers.
+    """
+    runs = []
+    for channel in sorted(channels):
+        if runs and channel == runs[-1][-1] + 1:
+            runs[-1].append(channel)
+        else:
+            runs.append([channel])
+    return runs
+
+def write_counts(counts_by_channel):
+    """
+    Write 12-bit OFF counts, one auto-increment block write per run of
+    consecutive channels (the leg channel map gives four runs of three).
+    Channels whose value has not changed are left out (see WRITE_THRESHOLD).
+    """
+    out = get_backend()
+    dirty = [channel for channel, counts in counts_by_channel.items() if is_dirty(channel, counts)]
+    for run in contiguous_runs(dirty):
+        buf = bytearray(4 * len(run))
+        for i, channel in enumerate(run):
+            struct.pack_into("<HH", buf, 4 * i, 0, counts_by_channel[channel])
+        out.write(LED0_ON_L + 4 * run[0], buf)
+        for channel in run:
+            last_counts[channel] = counts_by_channel[channel]
+        write_stats["issued"] += len(run)
+
+def write_channel_counts(frame):
+    """
+    Write OFF counts given as parallel sequences (channels, counts), the layout
+    RobotState produces, so the control loop never builds a dict per tick.
+    """
+    channels, counts = frame
+    write_counts(dict(zip(channels, counts)))
+
+def set_servos(angles_by_channel):
+    """
+    Set several servos at once from a dict channel -> angle, applying offsets.
+    """
+    write_counts({
+        channel: duty_to_counts(channel_pwm(channel, angle))
+        for channel, angle in angles_by_channel.items()
+    })
 
 def safe_set_servo(channel, angle):
     """
@@ -41,3 +155,30 @@ def safe_set_servo(channel, angle):
         set_servo(channel, angle)
     except OSError as e:
         print(f"[Servo Error] Failed to write to channel {channel} at angle {angle:.1f}: {e}")
+
+def safe_set_servos(angles_by_channel):
+    """
+    Set several servos safely, catching I/O errors.
+    """
+    try:
+        set_servos(angles_by_channel)
+    except OSError as e:
+        print(f"[Servo Error] Failed to write channels {sorted(angles_by_channel)}: {e}")
+
+def safe_write_channel_counts(frame):
+    """
+    Write (channels, counts) safely, catching I/O errors.
+    """
+    try:
+        write_channel_counts(frame)
+    except OSError as e:
+        print(f"[Servo Error] Failed to write channels {sorted(frame[0])}: {e}")
+
+def safe_write_counts(counts_by_channel):
+    """
+    Write precomputed OFF counts safely, catching I/O errors.
+    """
+    try:
+        write_counts(counts_by_channel)
+    except OSError as e:
+        print(f"[Servo Error] Failed to write channels {sorted(counts_by_channel)}: {e}")
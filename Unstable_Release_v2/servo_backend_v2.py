@@ -0,0 +1,96 @@
+import time
+
+# PCA9685 registers
+MODE1 = 0x00
+PRESCALE = 0xFE
+MODE1_RESTART = 0x80
+MODE1_AI = 0x20
+LED0_ON_L = 0x06
+
+class PCA9685Backend:
+    """
+    Real PCA9685 on the Pi's I2C bus (Adafruit driver).
+    Hardware libraries are only imported when this backend is created.
+    """
+
+    def __init__(self, frequency=330):
+        from board import SCL, SDA
+        import busio
+        from adafruit_pca9685 import PCA9685
+
+        self.i2c = busio.I2C(SCL, SDA)
+        self.pca = PCA9685(self.i2c)
+        self.pca.frequency = frequency
+
+        # Register auto-increment lets one write cover several consecutive channels
+        self.pca.mode1_reg = (self.pca.mode1_reg & ~MODE1_RESTART) | MODE1_AI
+
+    def write(self, register, data):
+        """Write data starting at register in one I2C transaction."""
+        with self.pca.i2c_device as i2c:
+            i2c.write(bytes([register]) + bytes(data))
+
+class MockPCA9685Backend:
+    """
+    In-memory PCA9685 that records every register write with a timestamp.
+    writes: list of (perf_counter time, register, data bytes)
+    registers: 256-byte image of the chip's registers after all writes
+    """
+
+    def __init__(self, frequency=330):
+        self.frequency = frequency
+        self.writes = []
+        self.registers = bytearray(256)
+        self.registers[MODE1] = MODE1_AI
+
+    def write(self, register, data):
+        self.writes.append((time.perf_counter(), register, bytes(data)))
+        self.registers[register:register + len(data)] = data
+
+    def channel_counts(self, channel):
+        """12-bit OFF count currently held for a channel."""
+        offset = LED0_ON_L + 4 * channel + 2
+        return self.registers[offset] | (self.registers[offset + 1] << 8)
+
+    def bytes_written(self):
+        return sum(len(data) for _, _, data in self.writes)
+
+class LatencyPCA9685Backend(MockPCA9685Backend):
+    """
+    Mock PCA9685 that also spends the time a real I2C transaction would take.
+    Each transaction costs start/stop plus 9 bits (8 data + ack) per byte on the
+    wire, address and register byte included, at bus_hz, plus a fixed overhead
+    in seconds for the driver/syscall.
+    """
+
+    def __init__(self, frequency=330, bus_hz=400000, overhead=0.0):
+        super().__init__(frequency)
+        self.bus_hz = bus_hz
+        self.overhead = overhead
+        self.bus_time = 0.0
+
+    def transaction_time(self, data_len):
+        bits = 2 + 9 * (2 + data_len)
+        return bits / self.bus_hz + self.overhead
+
+    def write(self, register, data):
+        cost = self.transaction_time(len(data))
+        # Busy-wait: time.sleep() is too coarse for sub-millisecond delays
+        end = time.perf_counter() + cost
+        while time.perf_counter() < end:
+            pass
+        self.bus_time += cost
+        super().write(register, data)
+
+BACKENDS = {
+    "pca9685": PCA9685Backend,
+    "mock": MockPCA9685Backend,
+    "latency-100k": lambda frequency=330: LatencyPCA9685Backend(frequency, bus_hz=100000),
+    "latency-400k": lambda frequency=330: LatencyPCA9685Backend(frequency, bus_hz=400000),
+}
+
+def make_backend(name, frequency=330):
+    """Create a servo backend by name (see BACKENDS)."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown servo backend '{name}', expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name](frequency=frequency)
@@ -0,0 +1,81 @@
+import threading
+from collections import deque
+from send_servo import get_backend, safe_set_servos, safe_write_counts, safe_write_channel_counts
+
+class ServoWriter:
+    """
+    Owns the PCA9685 on a background thread so the control loop never blocks on I2C.
+    The loop publishes complete frames (dict channel -> angle, or channel -> OFF
+    count) into a one-slot mailbox; the latest frame wins and stale frames are
+    dropped, never queued.
+
+    The servo backend is opened here, on the caller's thread, so a missing
+    driver or bus fails at startup. I/O errors on a write are reported and
+    skipped; anything else stops the thread and is kept in `error`, which the
+    control loop must check.
+    """
+
+    def __init__(self, idle_timeout=0.1):
+        get_backend()
+        # deque append/pop are atomic, so the mailbox needs no lock
+        self.mailbox = deque(maxlen=1)
+        self.published = 0
+        self.written = 0
+        self.idle_timeout = idle_timeout
+        self.error = None
+        self.running = True
+        self._ready = threading.Event()
+        self.thread = threading.Thread(target=self._write_loop)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def publish(self, angles_by_channel):
+        """
+        Hand a frame to the writer thread. Never blocks.
+        """
+        self._post(safe_set_servos, angles_by_channel)
+
+    def publish_counts(self, counts_by_channel):
+        """
+        Hand a frame of precomputed OFF counts to the writer thread. Never blocks.
+        """
+        self._post(safe_write_counts, counts_by_channel)
+
+    def publish_channel_counts(self, channels, counts):
+        """
+        Hand OFF counts as parallel sequences (see RobotState) to the writer thread.
+        counts must not be modified afterwards; pass a copy of a reused array.
+        """
+        self._post(safe_write_channel_counts, (channels, counts))
+
+    def _post(self, write, frame):
+        self.mailbox.append((write, frame))
+        self.published += 1
+        self._ready.set()
+
+    @property
+    def dropped(self):
+        """Frames replaced by a newer one before the writer picked them up."""
+        return self.published - self.written - len(self.mailbox)
+
+    def _write_loop(self):
+        while self.running:
+            self._ready.wait(self.idle_timeout)
+            self._ready.clear()
+            try:
+                write, frame = self.mailbox.pop()
+            except IndexError:
+                continue
+            try:
+                write(frame)
+            except Exception as e:
+                self.error = e
+                self.running = False
+                print(f"[Servo Error] Writer thread stopped: {e!r}")
+                break
+            self.written += 1
+
+    def stop(self):
+        self.running = False
+        self._ready.set()
+        self.thread.join()
@@ -0,0 +1,64 @@
+import numpy as np
+
+# Swing profiles map swing phase (0–1, scalar or array) to (forward, lift):
+#   forward: 0 at lift-off to 1 at touch-down, fraction of the step
+#   lift:    0 at both ends, 1 at the top, fraction of LIFT_HEIGHT
+# All are closed-form and vectorized, so a whole cycle can be evaluated at once.
+
+class SquareSwing:
+    """
+    Piecewise-linear lift, move forward, lower (a third of the swing each).
+    Velocity jumps at every corner; kept for comparison with the smooth profiles.
+    """
+
+    def __call__(self, phase):
+        phase = np.asarray(phase, dtype=float)
+        forward = np.clip(phase * 3 - 1, 0, 1)
+        lift = np.clip(np.minimum(phase * 3, 3 - phase * 3), 0, 1)
+        return forward, lift
+
+class BezierSwing:
+    """
+    Cubic Bezier foot path. Forward uses control points (0, -overshoot, 1 + overshoot, 1)
+    so the foot can pull back slightly before lift-off and reach past touch-down
+    for a softer landing; lift uses (0, 4/3, 4/3, 0), which peaks at exactly 1.
+    """
+
+    def __init__(self, overshoot=0.0):
+        self.overshoot = overshoot
+
+    def __call__(self, phase):
+        t = np.asarray(phase, dtype=float)
+        u = 1 - t
+        b1 = 3 * u * u * t
+        b2 = 3 * u * t * t
+        b3 = t * t * t
+        forward = -self.overshoot * b1 + (1 + self.overshoot) * b2 + b3
+        lift = 4 / 3 * (b1 + b2)
+        return forward, lift
+
+class MinimumJerkSwing:
+    """
+    Minimum-jerk foot path: zero velocity and acceleration at lift-off and
+    touch-down, so the interpolator has nothing to smooth out.
+    """
+
+    def __call__(self, phase):
+        t = np.asarray(phase, dtype=float)
+        forward = t * t * t * (10 - 15 * t + 6 * t * t)
+        lift = 64 * (t * (1 - t)) ** 3
+        return forward, lift
+
+SWING_PROFILES = {
+    "square": SquareSwing,
+    "bezier": BezierSwing,
+    "min_jerk": MinimumJerkSwing,
+}
+
+def swing_offsets(profile, phase, step_length, lift_height):
+    """
+    Foot (y, z) offsets from the neutral position for a swing going from
+    -step_length / 2 (end of stance) to +step_length / 2 (start of stance).
+    """
+    forward, lift = profile(phase)
+    return step_length * (forward - 0.5), lift_height * lift
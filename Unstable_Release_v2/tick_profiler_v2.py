@@ -0,0 +1,58 @@
+from array import array
+from time import perf_counter_ns
+import numpy as np
+
+class TickProfiler:
+    """
+    Low-overhead per-stage timing for the control tick.
+    Each stage keeps its last `size` durations (ns) in a preallocated ring buffer.
+
+    Usage, chaining one timestamp through the stages:
+        t = profiler.start()
+        ...
+        t = profiler.record("ik", t)
+    Recording costs one perf_counter_ns() call and a buffer store; when disabled
+    it only reads the clock, so it can stay in the loop in production.
+    """
+
+    def __init__(self, stages, size=1024, enabled=True):
+        self.enabled = enabled
+        self.size = size
+        self.buffers = {stage: array('q', bytes(8 * size)) for stage in stages}
+        self.counts = {stage: 0 for stage in stages}
+
+    def start(self):
+        return perf_counter_ns()
+
+    def record(self, stage, start_ns):
+        """
+        Record the time since start_ns for stage.
+        Returns the current time so it can start the next stage.
+        """
+        now = perf_counter_ns()
+        if self.enabled:
+            count = self.counts[stage]
+            self.buffers[stage][count % self.size] = now - start_ns
+            self.counts[stage] = count + 1
+        return now
+
+    def summary(self):
+        """
+        Returns dict stage -> (samples, p50, p99, max) in microseconds
+        over the samples currently in each ring buffer.
+        """
+        result = {}
+        for stage, buffer in self.buffers.items():
+            n = min(self.counts[stage], self.size)
+            if n == 0:
+                continue
+            samples = np.frombuffer(buffer, dtype=np.int64)[:n] / 1000
+            p50, p99 = np.percentile(samples, [50, 99])
+            result[stage] = (n, p50, p99, samples.max())
+        return result
+
+    def report(self):
+        lines = [f"{'stage':<14}{'n':>7}{'p50 us':>10}{'p99 us':>10}{'max us':>10}"]
+        for stage, (n, p50, p99, worst) in self.summary().items():
+            lines.append(f"{stage:<14}{n:>7}{p50:>10.1f}{p99:>10.1f}{worst:>10.1f}")
+        return "\n".join(lines)
@@ -0,0 +1,133 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import send_servo
+from batch_ik import batch_leg_ik, LEG_IDS, JOINTS
+from clock import SimulatedClock
+from interpolation import SmoothInterpolator
+
+STEP_QUANTUM = 0.25   # Step lengths are rounded to this (cm) before baking
+MAX_CYCLES = 16       # Baked cycles kept; the least recently used is dropped
+
+class TrajectoryCache:
+    """
+    Precomputed servo frames for steady crawl walking.
+
+    For a given step length and body height the whole chain (gait table,
+    interpolation, IK, calibration offsets, angle_to_pwm) is deterministic, so one
+    cycle is baked into a 12-channel OFF-count frame per control tick and replayed
+    by phase. The interpolator is simulated at the control rate for a settling
+    cycle first, so replayed frames match its steady-state output.
+
+    A baked cycle is invalidated when the step length (rounded to STEP_QUANTUM),
+    the body height or the calibration (send_servo.offsets_version) changes.
+    The foot targets behind the last returned frame are kept in `targets`.
+
+    Cycles are baked on a background thread, never in the control tick: until
+    a requested cycle is ready, frame() keeps replaying the last cycle it
+    returned (or returns None if there is none yet, and the caller runs its
+    live path).
+    """
+
+    def __init__(self, gait_controller, gait_table, channel_map, rate_hz=50, time_constant=0.0166,
+                 interpolation_mode="exponential", target_offset=(0, 0, 0), solve_ik=batch_leg_ik):
+        self.gait_table = gait_table.fork()
+        self.rate_hz = rate_hz
+        self.time_constant = time_constant
+        self.interpolation_mode = interpolation_mode
+        self.target_offset = np.asarray(target_offset, dtype=float)
+        self.solve_ik = solve_ik
+        self.channels = [channel_map[leg_id][joint] for leg_id in LEG_IDS for joint in JOINTS]
+
+        cycle_time = gait_controller.STEP_DURATION * gait_controller.NUM_PHASES
+        self.bins = int(round(cycle_time * rate_hz))
+        self.cycles = OrderedDict()   # key -> (list of frames (dict channel -> counts), targets)
+        self.current = None           # Cycle replayed while a newer one is baking
+        self.targets = None           # (legs, 3) foot targets of the last frame
+        self.hits = 0
+        self.stale = 0                # Frames replayed from an older cycle while baking
+        self.bakes = 0
+
+        self._lock = threading.Lock()
+        self._wanted = None           # Key to bake next (latest request wins)
+        self._ready = threading.Event()
+        self.running = True
+        self.thread = threading.Thread(target=self._bake_loop)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _bake(self, step_length, body_height):
+        clock = SimulatedClock()
+        interpolator = SmoothInterpolator(self.time_constant, self.interpolation_mode, clock=clock)
+        targets = np.empty((self.bins, len(LEG_IDS), 3))
+
+        # The first cycle lets the interpolator settle into its periodic response
+        for _ in range(2):
+            for i in range(self.bins):
+                clock.advance(1.0 / self.rate_hz)
+                raw_targets = self.gait_table.lookup(i / self.bins, step_length, 0, 0, body_height)
+                targets[i] = interpolator.update(raw_targets)
+
+        targets += self.target_offset
+        angles = self.solve_ik(targets).reshape(self.bins, -1)
+
+        frames = []
+        for row in angles:
+            frames.append({
+                channel: send_servo.duty_to_counts(send_servo.channel_pwm(channel, angle))
+                for channel, angle in zip(self.channels, row)
+            })
+        self.bakes += 1
+        return frames, targets
+
+    def _bake_loop(self):
+        while self.running:
+            self._ready.wait()
+            self._ready.clear()
+            key = self._wanted
+            if key is None or not self.running:
+                continue
+            with self._lock:
+                if key in self.cycles:
+                    continue
+            cycle = self._bake(key[0], key[1])
+            with self._lock:
+                self.cycles[key] = cycle
+                if len(self.cycles) > MAX_CYCLES:
+                    self.cycles.popitem(last=False)
+
+    def frame(self, phase, step_length, body_height):
+        """
+        Servo frame (dict channel -> OFF count) for a crawl cycle phase (0–1).
+        If the cycle is not cached, requests a bake and replays the last cycle
+        meanwhile; returns None if no cycle has been baked yet.
+        """
+        step_length = round(step_length / STEP_QUANTUM) * STEP_QUANTUM
+        key = (step_length, body_height, send_servo.offsets_version)
+
+        with self._lock:
+            cycle = self.cycles.get(key)
+            if cycle is not None:
+                self.cycles.move_to_end(key)
+        if cycle is None:
+            if self._wanted != key:
+                self._wanted = key
+                self._ready.set()
+            cycle = self.current
+            if cycle is None:
+                self.targets = None
+                return None
+            self.stale += 1
+        else:
+            self.current = cycle
+            self.hits += 1
+
+        frames, targets = cycle
+        index = int(phase * self.bins + 0.5) % self.bins
+        self.targets = targets[index]
+        return frames[index]
+
+    def stop(self):
+        self.running = False
+        self._ready.set()
+        self.thread.join()
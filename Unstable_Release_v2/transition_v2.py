@@ -0,0 +1,69 @@
+import numpy as np
+from clock import MonotonicClock
+
+class TransitionBlender:
+    """
+    Cross-fades leg targets and body pose angles when the target generator
+    changes (mode switch, gait start or switch), so the IK never sees a jump.
+
+    begin() starts a transition from the last frame that was output. Each update
+    blends from that frame (or from a live outgoing frame, if given) to the
+    incoming targets with a smoothstep weight over `window` seconds; body pose
+    angles (roll, pitch, yaw), if given, are blended with the same weight into
+    `angles`. Per-tick work is a fixed (legs, 3) blend into preallocated arrays.
+    """
+
+    def __init__(self, window=0.5, num_legs=4, clock=None):
+        self.window = window
+        self.clock = clock or MonotonicClock()
+        self.started = None
+        self.has_output = False
+        self.outgoing = np.zeros((num_legs, 3))
+        self.out = np.zeros((num_legs, 3))
+        self.outgoing_angles = np.zeros(3)
+        self.angles = np.zeros(3)
+
+    @property
+    def active(self):
+        """True while a transition is in progress."""
+        return self.started is not None
+
+    def begin(self):
+        """Start blending away from the last output frame."""
+        if not self.has_output or self.window <= 0:
+            return
+        self.outgoing[:] = self.out
+        self.outgoing_angles[:] = self.angles
+        self.started = self.clock.now()
+
+    def update(self, targets, outgoing=None, angles=(0, 0, 0)):
+        """
+        Blend toward targets (array (legs, 3)) and body pose angles (roll, pitch,
+        yaw in degrees). outgoing, if given, replaces the frozen last frame as the
+        source of the blend.
+        Returns the output array (updated in place); blended angles are in `angles`.
+        """
+        out = self.out
+        self.has_output = True
+        if self.started is None:
+            out[:] = targets
+            self.angles[:] = angles
+            return out
+
+        s = (self.clock.now() - self.started) / self.window
+        if s >= 1.0:
+            self.started = None
+            out[:] = targets
+            self.angles[:] = angles
+            return out
+
+        # Smoothstep: zero velocity at both ends of the window
+        weight = s * s * (3 - 2 * s)
+        source = self.outgoing if outgoing is None else outgoing
+        np.subtract(targets, source, out=out)
+        out *= weight
+        out += source
+        np.subtract(angles, self.outgoing_angles, out=self.angles)
+        self.angles *= weight
+        self.angles += self.outgoing_angles
+        return out